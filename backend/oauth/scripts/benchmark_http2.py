@@ -0,0 +1,103 @@
+"""
+Compara HTTP/1.1 e HTTP/2 com o Keycloak sob carga concorrente.
+
+Dispara o mesmo GET com cada transporte (mesmo pool e timeouts do gateway,
+sem o circuit breaker e o limite adaptativo) e mostra, por modo, a versão
+HTTP negociada, as conexões abertas e a latência (p50/p95/p99).
+
+Uso (a partir de backend/oauth, com as variáveis KEYCLOAK_* definidas):
+
+    python -m scripts.benchmark_http2 --requests 2000 --concurrency 100
+
+Por padrão consulta o JWKS do realm, que não exige token; use '--url' e
+'--token' para medir endpoints da API admin. HTTP/2 só é negociado sobre
+TLS (https) e requer o pacote 'h2'.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+from src.adapters.keycloak.http_client import _build_timeout, _build_transport
+from src.config import settings
+
+
+async def _run(
+    http2: bool, url: str, headers: dict, requests: int, concurrency: int
+) -> dict:
+    connections = 0
+
+    async def trace(event: str, _: dict) -> None:
+        nonlocal connections
+        if event == "connection.connect_tcp.complete":
+            connections += 1
+
+    latencies: list[float] = []
+    versions: Counter[str] = Counter()
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = _build_transport(http2)
+    async with httpx.AsyncClient(transport=transport, timeout=_build_timeout()) as client:
+
+        async def one() -> None:
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(
+                        url, headers=headers, extensions={"trace": trace}
+                    )
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+                versions[response.http_version] += 1
+                if response.is_error:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "mode": "HTTP/2" if http2 else "HTTP/1.1",
+        "versions": dict(versions),
+        "connections": connections,
+        "errors": errors,
+        "rps": requests / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default=settings.keycloak_jwks_url)
+    parser.add_argument("--token", help="Bearer token para endpoints protegidos")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    print(f"{args.requests} GETs em {args.url}, {args.concurrency} simultâneos")
+    print(f"{'modo':<9} {'versões':<26} {'conexões':>8} {'erros':>6} "
+          f"{'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for http2 in (False, True):
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("HTTP/2    ignorado: instale o pacote 'h2' (httpx[http2])")
+            continue
+        r = await _run(http2, args.url, headers, args.requests, args.concurrency)
+        print(f"{r['mode']:<9} {str(r['versions']):<26} {r['connections']:>8} "
+              f"{r['errors']:>6} {r['rps']:>8.1f} {r['p50']:>8.1f} "
+              f"{r['p95']:>8.1f} {r['p99']:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,24 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
 from typing import Annotated, Any
 
 import httpx
-from cachetools import TTLCache
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JOSEError, JWTError, jwk, jwt
+from jose.backends.base import Key
+from jose.utils import base64url_decode
 
+from src.adapters.instrumented_cache import InstrumentedTLRUCache
+from src.adapters.keycloak.http_client import get_http_client
 from src.adapters.keycloak.keycloak_client import KeycloakAdminClient
 from src.adapters.keycloak.keycloak_role_repository import KeycloakRoleRepository
 from src.adapters.keycloak.keycloak_user_repository import KeycloakUserRepository
+from src.adapters.keycloak.retry import send_idempotent
+from src.adapters.keycloak.singleflight import SingleFlight
 from src.config import settings
 from src.core.exceptions import InvalidTokenError
 from src.core.ports.role_repository import IRoleRepository
@@ -16,80 +26,255 @@ from src.core.ports.user_repository import IUserRepository
 from src.core.services.role_service import RoleService
 from src.core.services.user_service import UserService
 
+logger = logging.getLogger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
-jwks_cache = TTLCache(maxsize=10, ttl=600)
 
 
-async def get_jwks() -> dict[str, Any]:
-    jwks = jwks_cache.get("jwks")
-    if jwks:
-        return jwks
-    async with httpx.AsyncClient() as client:
-        response = await client.get(settings.keycloak_jwks_url)
-        response.raise_for_status()
-        new_jwks = response.json()
-        jwks_cache["jwks"] = new_jwks
-        return new_jwks
+def _verified_token_ttu(_key: str, payload: dict[str, Any], now: float) -> float:
+    """A entrada vive no máximo TOKEN_CACHE_TTL e nunca além do 'exp' do token."""
+    expires_at = now + settings.TOKEN_CACHE_TTL
+    exp = payload.get("exp")
+    if exp is not None:
+        expires_at = min(expires_at, float(exp))
+    return expires_at
 
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-) -> dict[str, Any]:
+# Payloads de tokens já verificados, indexados pelo hash do token.
+verified_token_cache = InstrumentedTLRUCache(
+    "verified_tokens",
+    maxsize=settings.TOKEN_CACHE_MAXSIZE,
+    ttu=_verified_token_ttu,
+    timer=time.time,
+)
+
+
+def _build_key_index(jwks: dict[str, Any]) -> dict[str, Key]:
     """
-    Decodifica e valida o token JWT de forma segura.
+    Constrói o índice kid -> chave pública pronta para uso a partir do JWKS.
+
+    Chaves de criptografia (use=enc), sem 'kid' ou de tipo não suportado
+    são ignoradas.
+    """
+    index: dict[str, Key] = {}
+    for key_data in jwks.get("keys", []):
+        kid = key_data.get("kid")
+        if not kid or key_data.get("use", "sig") != "sig":
+            continue
+        try:
+            index[kid] = jwk.construct(
+                key_data, algorithm=key_data.get("alg", settings.KEYCLOAK_TOKEN_ALGORITHM)
+            )
+        except JOSEError:
+            # JWKError (tipo não suportado pelo python-jose) não herda de JWTError.
+            continue
+    return index
+
 
-    Esta função busca o JWKS (JSON Web Key Set) do Keycloak e utiliza a lista
-    de chaves para que a biblioteca 'jose' possa selecionar a chave correta
-    baseada no 'kid' do cabeçalho do token e então verificar sua assinatura
-    e claims. Este método evita a vulnerabilidade de usar um cabeçalho
-    não verificado para guiar o processo de validação.
+class JWKSCache:
     """
+    Índice de chaves públicas do realm com revalidação em segundo plano.
+
+    Chaves vencidas continuam sendo servidas enquanto uma única busca ao
+    endpoint de certs do Keycloak roda em segundo plano (stale-while-revalidate).
+    """
+
+    def __init__(self) -> None:
+        self.keys: dict[str, Key] | None = None
+        self.fetched_at = 0.0
+        self.last_forced_refresh = float("-inf")
+        self._singleflight = SingleFlight()
+        self._background_task: asyncio.Task[None] | None = None
+
+    def store(self, keys: dict[str, Key]) -> None:
+        self.keys = keys
+        self.fetched_at = time.monotonic()
+
+    def clear(self) -> None:
+        self.keys = None
+        self.fetched_at = 0.0
+        self.last_forced_refresh = float("-inf")
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    async def refresh(self) -> dict[str, Key]:
+        """Busca o JWKS; chamadas concorrentes compartilham a mesma busca."""
+        return await self._singleflight.do("jwks", self._fetch)
+
+    def refresh_in_background(self) -> None:
+        if self._singleflight.in_flight("jwks"):
+            return
+        self._background_task = asyncio.ensure_future(self._refresh_quietly())
+
+    async def refresh_for_unknown_kid(self) -> dict[str, Key] | None:
+        """
+        Busca o JWKS imediatamente (ex.: após rotação de chaves), limitado a uma
+        busca a cada JWKS_UNKNOWN_KID_MIN_INTERVAL para que tokens inválidos não
+        provoquem uma enxurrada de buscas. Retorna None se o limite impedir a busca.
+        """
+        now = time.monotonic()
+        if now - self.last_forced_refresh < settings.JWKS_UNKNOWN_KID_MIN_INTERVAL:
+            return None
+        self.last_forced_refresh = now
+        try:
+            return await self.refresh()
+        except httpx.HTTPError:
+            logger.warning("Falha ao buscar o JWKS para 'kid' desconhecido", exc_info=True)
+            return None
+
+    async def _fetch(self) -> dict[str, Key]:
+        client = get_http_client()
+        response = await send_idempotent(lambda: client.get(settings.keycloak_jwks_url))
+        response.raise_for_status()
+        keys = _build_key_index(response.json())
+        self.store(keys)
+        return keys
+
+    async def _refresh_quietly(self) -> None:
+        try:
+            await self.refresh()
+        except Exception:
+            # As chaves atuais continuam válidas; a próxima requisição tenta de novo.
+            logger.warning("Falha ao atualizar o JWKS em segundo plano", exc_info=True)
+
+
+jwks_cache = JWKSCache()
+
+
+async def get_jwks() -> dict[str, Key]:
+    """Retorna o índice kid -> chave pública do realm, montado uma vez por busca."""
+    keys = jwks_cache.keys
+    if keys is None or jwks_cache.age >= settings.JWKS_MAX_AGE:
+        return await jwks_cache.refresh()
+    if jwks_cache.age >= settings.JWKS_REFRESH_INTERVAL:
+        jwks_cache.refresh_in_background()
+    return keys
+
+
+def _unverified_kid(token: str) -> str | None:
+    """
+    Lê o 'kid' do cabeçalho do token sem decodificar o restante. Cabeçalhos
+    malformados (ou um 'kid' que não seja string) resultam em None.
+    """
+    try:
+        header = json.loads(base64url_decode(token.split(".", 1)[0].encode()))
+    except ValueError:
+        return None
+    if not isinstance(header, dict):
+        return None
+    kid = header.get("kid")
+    return kid if isinstance(kid, str) else None
+
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def _decode_token(token: str) -> dict[str, Any]:
+    """Verifica a assinatura, o emissor e a expiração do token, retornando o payload."""
     try:
-        jwks = await get_jwks()
-        # Decodificar sem validar audience primeiro para verificar se o client ID está no array
-        payload = jwt.decode(
+        keys = await get_jwks()
+        # O 'kid' só escolhe a chave; o algoritmo continua restrito pela configuração.
+        kid = _unverified_kid(token)
+        key = keys.get(kid) if kid else None
+        if key is None and kid:
+            # Possível rotação de chaves no Keycloak: tenta buscar o JWKS novamente.
+            refreshed_keys = await jwks_cache.refresh_for_unknown_kid()
+            if refreshed_keys is not None:
+                key = refreshed_keys.get(kid)
+        if key is None:
+            raise InvalidTokenError(
+                description=f"Token inválido: chave de assinatura '{kid}' desconhecida."
+            )
+        # A audience é validada à parte em '_check_audience'
+        return jwt.decode(
             token,
-            jwks["keys"],  
+            key,
             algorithms=[settings.KEYCLOAK_TOKEN_ALGORITHM],
-            options={"verify_aud": False},  # Desabilitar validação de audience temporariamente
+            options={"verify_aud": False},
             issuer=f"{settings.KEYCLOAK_SERVER_URL}/realms/{settings.KEYCLOAK_REALM}",
         )
-        
-        # Validar audience manualmente: pode ser string ou array
-        token_aud = payload.get("aud")
-        client_id = settings.KEYCLOAK_CLIENT_ID
-        
-        if isinstance(token_aud, list):
-            # Se audience é array, verificar se o client ID está na lista
-            # ou se "oauth" está na lista (client ID pode ser "oauth")
-            if client_id not in token_aud and "oauth" not in token_aud:
-                # Também verificar se o azp (authorized party) corresponde ao client ID
-                azp = payload.get("azp")
-                if azp != client_id and azp != "oauth":
-                    raise InvalidTokenError(
-                        description=f"Token audience inválido. Esperado: {client_id}, Recebido: {token_aud}"
-                    )
-        elif isinstance(token_aud, str):
-            # Se audience é string, deve corresponder exatamente
-            if token_aud != client_id and token_aud != "oauth":
-                azp = payload.get("azp")
-                if azp != client_id and azp != "oauth":
-                    raise InvalidTokenError(
-                        description=f"Token audience inválido. Esperado: {client_id}, Recebido: {token_aud}"
-                    )
-        else:
-            # Se não há audience, verificar azp
+    except JWTError as e:
+        raise InvalidTokenError(description=f"Token inválido ou expirado: {e}") from e
+
+
+def _check_audience(payload: dict[str, Any]) -> None:
+    """Garante que o token foi emitido para este client (audience ou azp)."""
+    # Validar audience manualmente: pode ser string ou array
+    token_aud = payload.get("aud")
+    client_id = settings.KEYCLOAK_CLIENT_ID
+
+    if isinstance(token_aud, list):
+        # Se audience é array, verificar se o client ID está na lista
+        # ou se "oauth" está na lista (client ID pode ser "oauth")
+        if client_id not in token_aud and "oauth" not in token_aud:
+            # Também verificar se o azp (authorized party) corresponde ao client ID
             azp = payload.get("azp")
             if azp != client_id and azp != "oauth":
                 raise InvalidTokenError(
-                    description="Token sem audience válido"
+                    description=f"Token audience inválido. Esperado: {client_id}, Recebido: {token_aud}"
                 )
-        
-        # Adicionar o token ao payload para uso posterior
-        payload["_token"] = token
-        return payload
-    except JWTError as e:
-        raise InvalidTokenError(description=f"Token inválido ou expirado: {e}") from e
+    elif isinstance(token_aud, str):
+        # Se audience é string, deve corresponder exatamente
+        if token_aud != client_id and token_aud != "oauth":
+            azp = payload.get("azp")
+            if azp != client_id and azp != "oauth":
+                raise InvalidTokenError(
+                    description=f"Token audience inválido. Esperado: {client_id}, Recebido: {token_aud}"
+                )
+    else:
+        # Se não há audience, verificar azp
+        azp = payload.get("azp")
+        if azp != client_id and azp != "oauth":
+            raise InvalidTokenError(
+                description="Token sem audience válido"
+            )
+
+
+async def verify_token(token: str) -> dict[str, Any]:
+    """
+    Verifica localmente o token (assinatura via JWKS, emissor e expiração).
+
+    Tokens já verificados ficam em cache (chave: hash do token) até o seu
+    'exp'; nesse caso a assinatura não é verificada de novo, apenas a expiração.
+    Retorna uma cópia do payload, que pode ser alterada pelo chamador.
+    """
+    cache_key = _token_cache_key(token)
+    cached_payload = verified_token_cache.lookup(cache_key)
+    if cached_payload is not None:
+        exp = cached_payload.get("exp")
+        if exp is not None and float(exp) <= time.time():
+            verified_token_cache.pop(cache_key, None)
+            raise InvalidTokenError(
+                description="Token inválido ou expirado: Signature has expired."
+            )
+        return dict(cached_payload)
+
+    payload = await _decode_token(token)
+    verified_token_cache[cache_key] = dict(payload)
+    return payload
+
+
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+) -> dict[str, Any]:
+    """
+    Decodifica e valida o token JWT de forma segura.
+
+    Esta função busca o JWKS (JSON Web Key Set) do Keycloak, já indexado por
+    'kid', e verifica a assinatura e os claims com a chave correspondente ao
+    'kid' do cabeçalho. O cabeçalho não verificado só seleciona a chave: o
+    algoritmo aceito continua sendo o configurado, e tokens com 'kid'
+    desconhecido são rejeitados sem tentativa de verificação.
+    """
+    payload = await verify_token(token)
+    _check_audience(payload)
+
+    # Adicionar o token ao payload para uso posterior
+    payload["_token"] = token
+    return payload
 
 
 async def get_user_token(
@@ -102,23 +287,32 @@ async def get_user_token(
 
 
 # --- Funções de Injeção de Dependência ---
-def get_user_repository(
+def get_keycloak_client(
     user_token: Annotated[str, Depends(get_user_token)],
+) -> KeycloakAdminClient:
+    """
+    Cria o client do Keycloak da requisição, com o token do usuário autenticado.
+    O FastAPI reutiliza o mesmo client para todas as dependências da requisição,
+    então os repositórios compartilham as leituras memoizadas.
+    """
+    return KeycloakAdminClient(user_token=user_token)
+
+
+def get_user_repository(
+    client: Annotated[KeycloakAdminClient, Depends(get_keycloak_client)],
 ) -> IUserRepository:
     """
-    Cria um repositório de usuários usando o token do usuário autenticado.
+    Cria um repositório de usuários usando o client da requisição.
     """
-    client = KeycloakAdminClient(user_token=user_token)
     return KeycloakUserRepository(client=client)
 
 
 def get_role_repository(
-    user_token: Annotated[str, Depends(get_user_token)],
+    client: Annotated[KeycloakAdminClient, Depends(get_keycloak_client)],
 ) -> IRoleRepository:
     """
-    Cria um repositório de roles usando o token do usuário autenticado.
+    Cria um repositório de roles usando o client da requisição.
     """
-    client = KeycloakAdminClient(user_token=user_token)
     return KeycloakRoleRepository(client=client)
 
 
@@ -0,0 +1,37 @@
+from collections.abc import Iterable
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+
+class ListSerializer:
+    """
+    Serializa listas de objetos de domínio direto para JSON no formato de um
+    schema de resposta (mesmas chaves e aliases do 'response_model').
+
+    O mapeamento campo -> alias é calculado uma vez a partir do schema, e os
+    itens não são revalidados: a rota retorna a Response pronta, e o
+    'response_model' continua declarado apenas para o OpenAPI.
+    """
+
+    def __init__(self, schema: type[BaseModel]) -> None:
+        self._keys = tuple(
+            (name, field.alias or name) for name, field in schema.model_fields.items()
+        )
+
+    def dump(self, items: Iterable[Any]) -> bytes:
+        keys = self._keys
+        return to_json([{alias: getattr(item, name) for name, alias in keys} for item in items])
+
+    def dump_lines(self, items: Iterable[Any]) -> bytes:
+        """Um objeto JSON por linha (NDJSON)."""
+        keys = self._keys
+        return b"".join(
+            to_json({alias: getattr(item, name) for name, alias in keys}) + b"\n"
+            for item in items
+        )
+
+    def response(self, items: Iterable[Any]) -> Response:
+        return Response(content=self.dump(items), media_type="application/json")
@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Query, Request, Response
+
+from src.adapters.api.fast_json import ListSerializer
+from src.config import settings
+from src.core.domain.page import Page
+
+
+@dataclass(frozen=True)
+class PageParams:
+    first: int
+    max_results: int
+
+
+def pagination_params(
+    first: int = Query(0, ge=0, description="Índice do primeiro item da página."),
+    max_results: int = Query(
+        settings.PAGE_SIZE_DEFAULT,
+        alias="max",
+        ge=1,
+        le=settings.PAGE_SIZE_MAX,
+        description=f"Tamanho da página (máximo {settings.PAGE_SIZE_MAX}).",
+    ),
+) -> PageParams:
+    """Dependência com os parâmetros de paginação 'first' e 'max'."""
+    return PageParams(first=first, max_results=max_results)
+
+
+def paginate(request: Request, response: Response, page: Page[Any]) -> list[Any]:
+    """
+    Publica os metadados da página nos headers (Link com rel="next"/"prev" e,
+    quando conhecido, X-Total-Count) e retorna os itens para o corpo.
+    """
+    links = []
+    if page.has_more:
+        next_url = request.url.include_query_params(first=page.first + page.max, max=page.max)
+        links.append(f'<{next_url}>; rel="next"')
+    if page.first > 0:
+        prev_url = request.url.include_query_params(
+            first=max(page.first - page.max, 0), max=page.max
+        )
+        links.append(f'<{prev_url}>; rel="prev"')
+    if links:
+        response.headers["Link"] = ", ".join(links)
+    if page.total is not None:
+        response.headers["X-Total-Count"] = str(page.total)
+    return page.items
+
+
+def paginated_response(
+    request: Request, page: Page[Any], serializer: ListSerializer
+) -> Response:
+    """Como 'paginate', mas já serializa os itens com o ListSerializer da rota."""
+    response = serializer.response(page.items)
+    paginate(request, response, page)
+    return response
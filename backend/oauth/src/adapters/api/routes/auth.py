@@ -1,20 +1,50 @@
 # auth.py
 import base64
+import hashlib
 import json
+import time
 from typing import Annotated, Any
 
 import httpx
-from fastapi import APIRouter, Depends, Form, HTTPException, status
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
+from src.adapters.api.dependencies import verify_token
 from src.adapters.api.schemas.auth_schemas import IntrospectResponse
 from src.adapters.api.schemas.user_schemas import TokenResponse
+from src.adapters.instrumented_cache import InstrumentedTLRUCache, InstrumentedTTLCache
+from src.adapters.keycloak.http_client import get_http_client
 from src.config import settings
+from src.core.exceptions import InvalidTokenError
 
 router = APIRouter(tags=["Authentication"])
 
 # Dependência para extrair o token do header Authorization
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+
+def _introspection_ttu(_key: str, result: dict[str, Any], now: float) -> float:
+    """A entrada vive no máximo INTROSPECTION_CACHE_TTL e nunca além do 'exp'."""
+    expires_at = now + settings.INTROSPECTION_CACHE_TTL
+    exp = result.get("exp")
+    if exp is not None:
+        expires_at = min(expires_at, float(exp))
+    return expires_at
+
+
+# Resultados de introspecção indexados pelo hash do token.
+introspection_cache = InstrumentedTLRUCache(
+    "introspection",
+    maxsize=settings.INTROSPECTION_CACHE_MAXSIZE,
+    ttu=_introspection_ttu,
+    timer=time.time,
+)
+inactive_token_cache = InstrumentedTTLCache(
+    "introspection_inactive",
+    maxsize=settings.INTROSPECTION_NEGATIVE_CACHE_MAXSIZE,
+    ttl=settings.INTROSPECTION_NEGATIVE_CACHE_TTL,
+)
+
+
 @router.post(
     "/login",
     response_model=TokenResponse,
@@ -26,26 +56,26 @@ async def login(username: Annotated[str, Form()], password: Annotated[str, Form(
     Autentica o usuário com username e password, usando o 'password' grant type do Keycloak.
     Retorna access_token e refresh_token.
     """
-    async with httpx.AsyncClient() as client:
-        token_data = {
-            "client_id": settings.KEYCLOAK_CLIENT_ID,
-            "client_secret": settings.KEYCLOAK_CLIENT_SECRET,
-            "username": username,
-            "password": password,
-            "grant_type": "password",
-        }
-        try:
-            response = await client.post(settings.keycloak_token_url, data=token_data)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code in (400, 401):
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Credenciais inválidas. Verifique o usuário e a senha.",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            raise
+    client = get_http_client()
+    token_data = {
+        "client_id": settings.KEYCLOAK_CLIENT_ID,
+        "client_secret": settings.KEYCLOAK_CLIENT_SECRET,
+        "username": username,
+        "password": password,
+        "grant_type": "password",
+    }
+    try:
+        response = await client.post(settings.keycloak_token_url, data=token_data)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code in (400, 401):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciais inválidas. Verifique o usuário e a senha.",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        raise
 
 
 @router.post(
@@ -58,24 +88,116 @@ async def refresh_token(refresh_token: Annotated[str, Form()]):
     """
     Obtém um novo access_token e refresh_token usando um refresh_token válido.
     """
-    async with httpx.AsyncClient() as client:
-        token_data = {
-            "client_id": settings.KEYCLOAK_CLIENT_ID,
-            "client_secret": settings.KEYCLOAK_CLIENT_SECRET,
-            "refresh_token": refresh_token,
-            "grant_type": "refresh_token",
-        }
-        try:
-            response = await client.post(settings.keycloak_token_url, data=token_data)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 400:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Refresh token inválido ou expirado.",
-                )
-            raise
+    client = get_http_client()
+    token_data = {
+        "client_id": settings.KEYCLOAK_CLIENT_ID,
+        "client_secret": settings.KEYCLOAK_CLIENT_SECRET,
+        "refresh_token": refresh_token,
+        "grant_type": "refresh_token",
+    }
+    try:
+        response = await client.post(settings.keycloak_token_url, data=token_data)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 400:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Refresh token inválido ou expirado.",
+            )
+        raise
+
+
+def _invalid_token_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token inválido ou expirado.",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _merge_token_claims(result: dict[str, Any], token: str) -> None:
+    """Copia para 'result' os roles e a identidade do payload do token JWT."""
+    try:
+        # JWT tem 3 partes separadas por ponto: header.payload.signature
+        parts = token.split(".")
+        if len(parts) >= 2:
+            # Decodificar o payload (segunda parte)
+            payload_encoded = parts[1]
+            # Adicionar padding se necessário
+            padding = 4 - len(payload_encoded) % 4
+            if padding != 4:
+                payload_encoded += "=" * padding
+            payload_bytes = base64.urlsafe_b64decode(payload_encoded)
+            payload_json = json.loads(payload_bytes)
+
+            # Adicionar informações do payload ao resultado
+            if "realm_access" in payload_json:
+                result["realm_access"] = payload_json["realm_access"]
+            if "resource_access" in payload_json:
+                result["resource_access"] = payload_json["resource_access"]
+            if "preferred_username" in payload_json:
+                result["preferred_username"] = payload_json["preferred_username"]
+            if "sub" in payload_json:
+                result["sub"] = payload_json["sub"]
+    except Exception:
+        # Se falhar ao decodificar, continuar com o resultado do introspect
+        pass
+
+
+async def _introspect(token: str, use_cache: bool = True) -> dict[str, Any]:
+    """
+    Valida o token no endpoint de introspecção do Keycloak.
+
+    Resultados ficam em cache; com 'use_cache=False' o Keycloak é sempre
+    consultado, mas o resultado ainda atualiza o cache.
+    """
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    if use_cache:
+        cached_result = introspection_cache.lookup(cache_key)
+        if cached_result is not None:
+            return dict(cached_result)
+        if inactive_token_cache.lookup(cache_key) is not None:
+            raise _invalid_token_exception()
+
+    client = get_http_client()
+    keycloak_introspect_url = f"{settings.keycloak_token_url}/introspect"
+    try:
+        response = await client.post(
+            keycloak_introspect_url,
+            data={"token": token},
+            auth=(settings.KEYCLOAK_CLIENT_ID, settings.KEYCLOAK_CLIENT_SECRET),
+        )
+        response.raise_for_status()
+        introspection_result = response.json()
+    except httpx.HTTPStatusError:
+        raise _invalid_token_exception()
+
+    if not introspection_result.get("active"):
+        introspection_cache.pop(cache_key, None)
+        inactive_token_cache[cache_key] = True
+        raise _invalid_token_exception()
+
+    _merge_token_claims(introspection_result, token)
+    introspection_cache[cache_key] = dict(introspection_result)
+    return introspection_result
+
+
+def _claims_to_introspection(claims: dict[str, Any]) -> dict[str, Any]:
+    """Monta a resposta no formato da introspecção a partir dos claims verificados."""
+    result = dict(claims)
+    result["active"] = True
+    result.setdefault("username", claims.get("preferred_username"))
+    result.setdefault("client_id", claims.get("azp"))
+    result.setdefault("token_type", claims.get("typ", "Bearer"))
+    return result
+
+
+def _expires_soon(claims: dict[str, Any]) -> bool:
+    exp = claims.get("exp")
+    if exp is None:
+        return True
+    return float(exp) - time.time() < settings.TOKEN_HYBRID_INTROSPECT_WINDOW
 
 
 @router.post(
@@ -84,61 +206,33 @@ async def refresh_token(refresh_token: Annotated[str, Form()]):
     summary="Validação de Access Token",
     status_code=status.HTTP_200_OK,
 )
-async def validate_token(token: Annotated[str, Depends(oauth2_scheme)]):
+async def validate_token(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    introspect: Annotated[
+        bool,
+        Query(
+            description="Força a consulta ao Keycloak (introspecção) no modo 'hybrid'."
+        ),
+    ] = False,
+):
     """
-    Valida um access_token, verificando sua autenticidade e se não está expirado
-    junto ao provedor de identidade (Keycloak).
+    Valida um access_token, verificando sua autenticidade e se não está expirado.
+
+    Conforme TOKEN_VALIDATION_MODE, a validação é feita junto ao provedor de
+    identidade (Keycloak), localmente com o JWKS do realm, ou de forma híbrida:
+    localmente, consultando o Keycloak apenas para tokens perto de expirar ou
+    quando 'introspect=true'. A validação local não detecta tokens revogados
+    (ex.: logout) antes do 'exp'.
     """
-    async with httpx.AsyncClient() as client:
-        keycloak_introspect_url = f"{settings.keycloak_token_url}/introspect"
-        try:
-            response = await client.post(
-                keycloak_introspect_url,
-                data={"token": token},
-                auth=(settings.KEYCLOAK_CLIENT_ID, settings.KEYCLOAK_CLIENT_SECRET),
-            )
-            response.raise_for_status()
-            introspection_result = response.json()
-
-            if not introspection_result.get("active"):
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Token inválido ou expirado.",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-
-            # Decodificar o payload do token JWT para obter roles
-            try:
-                # JWT tem 3 partes separadas por ponto: header.payload.signature
-                parts = token.split(".")
-                if len(parts) >= 2:
-                    # Decodificar o payload (segunda parte)
-                    payload_encoded = parts[1]
-                    # Adicionar padding se necessário
-                    padding = 4 - len(payload_encoded) % 4
-                    if padding != 4:
-                        payload_encoded += "=" * padding
-                    payload_bytes = base64.urlsafe_b64decode(payload_encoded)
-                    payload_json = json.loads(payload_bytes)
-                    
-                    # Adicionar informações do payload ao resultado
-                    if "realm_access" in payload_json:
-                        introspection_result["realm_access"] = payload_json["realm_access"]
-                    if "resource_access" in payload_json:
-                        introspection_result["resource_access"] = payload_json["resource_access"]
-                    if "preferred_username" in payload_json:
-                        introspection_result["preferred_username"] = payload_json["preferred_username"]
-                    if "sub" in payload_json:
-                        introspection_result["sub"] = payload_json["sub"]
-            except Exception:
-                # Se falhar ao decodificar, continuar com o resultado do introspect
-                pass
-
-            return introspection_result
-
-        except httpx.HTTPStatusError:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token inválido ou expirado.",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
\ No newline at end of file
+    mode = settings.TOKEN_VALIDATION_MODE
+    if mode == "introspection":
+        return await _introspect(token)
+
+    try:
+        claims = await verify_token(token)
+    except InvalidTokenError:
+        raise _invalid_token_exception()
+
+    if mode == "hybrid" and (introspect or _expires_soon(claims)):
+        return await _introspect(token, use_cache=not introspect)
+    return _claims_to_introspection(claims)
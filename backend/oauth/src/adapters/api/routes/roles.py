@@ -1,14 +1,23 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, Response, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 
 # Supondo que você tenha essas dependências configuradas
 from src.adapters.api.dependencies import get_current_user, get_role_service
+from src.adapters.api.fast_json import ListSerializer
+from src.adapters.api.pagination import (
+    PageParams,
+    paginated_response,
+    pagination_params,
+)
 from src.adapters.api.schemas.role_schemas import (
+    BulkRoleAssignmentRequest,
+    BulkRoleAssignmentResponse,
     RoleCreateRequest,
     RolePartialUpdateRequest,
     RoleResponse,
     RoleUpdateRequest,
 )
+from src.core.domain.bulk import RoleAssignmentResult
 from src.core.services.role_service import RoleService
 
 router = APIRouter(
@@ -17,6 +26,8 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)],
 )
 
+_roles_json = ListSerializer(RoleResponse)
+
 
 @router.post(
     "",
@@ -35,25 +46,74 @@ async def create_role(
     return created_role
 
 
+def _assignment_response(results: list[RoleAssignmentResult]) -> BulkRoleAssignmentResponse:
+    succeeded = sum(1 for result in results if result.succeeded)
+    return BulkRoleAssignmentResponse(
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=[result.model_dump() for result in results],
+    )
+
+
+# As rotas de "/assignments" são declaradas antes de "/{role_id}".
+@router.post(
+    "/assignments",
+    response_model=BulkRoleAssignmentResponse,
+    summary="Atribuir roles a vários usuários",
+    description="Atribui os roles informados a cada um dos usuários da lista. Os roles são resolvidos uma única vez e as atribuições são feitas em paralelo limitado. Cada usuário tem seu próprio resultado.",
+    response_description="O resultado da atribuição para cada usuário.",
+)
+async def assign_roles_to_users(
+    request: BulkRoleAssignmentRequest,
+    role_service: RoleService = Depends(get_role_service),
+):
+    """Atribui um conjunto de roles a vários usuários."""
+    results = await role_service.assign_roles_to_users(request.user_ids, request.role_ids)
+    return _assignment_response(results)
+
+
+@router.delete(
+    "/assignments",
+    response_model=BulkRoleAssignmentResponse,
+    summary="Remover roles de vários usuários",
+    description="Remove os roles informados de cada um dos usuários da lista. Os roles são resolvidos uma única vez e as remoções são feitas em paralelo limitado. Cada usuário tem seu próprio resultado.",
+    response_description="O resultado da remoção para cada usuário.",
+)
+async def remove_roles_from_users(
+    request: BulkRoleAssignmentRequest,
+    role_service: RoleService = Depends(get_role_service),
+):
+    """Remove um conjunto de roles de vários usuários."""
+    results = await role_service.remove_roles_from_users(request.user_ids, request.role_ids)
+    return _assignment_response(results)
+
+
 @router.get(
     "",
     response_model=list[RoleResponse],
     summary="Listar todos os roles",
-    description="Retorna uma lista com todos os roles cadastrados, com a opção de filtrar por status (enabled).",
-    response_description="Uma lista contendo todos os roles.",
+    description="Retorna uma página de roles cadastrados (parâmetros 'first' e 'max'), ordenados por nome, com a opção de filtrar por status (enabled) e por parte do nome (search). Os headers 'Link' e 'X-Total-Count' trazem os metadados da paginação.",
+    response_description="Uma lista contendo os roles da página.",
 )
 async def get_all_roles(
+    request: Request,
     enabled: Optional[bool] = None,
+    search: Optional[str] = Query(None, description="Filtra roles cujo nome contém o termo."),
+    page_params: PageParams = Depends(pagination_params),
     role_service: RoleService = Depends(get_role_service)
 ):
     """
-    Recupera os dados de todos os roles cadastrados.
+    Recupera os dados dos roles cadastrados, uma página por vez.
     
     - Se `enabled=true`, retorna apenas os roles ativos.
     - Se `enabled=false`, retorna apenas os roles inativos.
     - Se o parâmetro for omitido, retorna todos os roles.
+    - `search` restringe aos roles cujo nome contém o termo.
     """
-    return await role_service.get_all_roles(enabled=enabled)
+    page = await role_service.get_roles_page(
+        page_params.first, page_params.max_results, enabled=enabled, search=search
+    )
+    return paginated_response(request, page, _roles_json)
 
 
 @router.get(
@@ -1,23 +1,66 @@
-from fastapi import APIRouter, Depends, Response, status
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from src.adapters.api.dependencies import (
     get_current_user,
     get_role_service,
     get_user_service,
 )
+from src.adapters.api.fast_json import ListSerializer
+from src.adapters.api.pagination import (
+    PageParams,
+    paginated_response,
+    pagination_params,
+)
 # Importar o RoleResponse
 from src.adapters.api.schemas.role_schemas import RoleResponse, UserRolesRequest
 from src.adapters.api.schemas.user_schemas import (
+    BulkCreateOperation,
+    BulkUpdateOperation,
+    BulkUserRequest,
+    BulkUserResponse,
     PasswordUpdateRequest,
     UserCreateRequest,
     UserResponse,
     UserUpdateRequest,
 )
+from src.core.domain.bulk import BulkOperation
+from src.core.domain.user import User, UserFilter
 from src.core.services.role_service import RoleService
 from src.core.services.user_service import UserService
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+_users_json = ListSerializer(UserResponse)
+_roles_json = ListSerializer(RoleResponse)
+
+
+def user_filter_params(
+    enabled: bool | None = None,
+    search: str | None = Query(
+        None, description="Busca em username, e-mail, nome e sobrenome."
+    ),
+    username: str | None = None,
+    email: str | None = None,
+    first_name: str | None = None,
+    last_name: str | None = None,
+    exact: bool = Query(
+        False, description="Se verdadeiro, os filtros por campo exigem igualdade exata."
+    ),
+) -> UserFilter:
+    """Filtros da listagem de usuários, repassados ao Keycloak."""
+    return UserFilter(
+        enabled=enabled,
+        search=search,
+        username=username,
+        email=email,
+        first_name=first_name,
+        last_name=last_name,
+        exact=exact,
+    )
+
 
 @router.post(
     "",
@@ -36,21 +79,94 @@ async def create_user(
     return await user_service.create_user(user_data.model_dump())
 
 
+@router.post(
+    "/bulk",
+    response_model=BulkUserResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Criar, atualizar ou desativar usuários em lote",
+    description="Executa um lote de operações (create, update, disable) contra o Keycloak com concorrência limitada. Criações usam o partialImport do Keycloak quando disponível. Cada operação tem seu próprio resultado; a falha de um item não interrompe os demais. Requer autenticação.",
+    response_description="O resultado de cada operação, na ordem da requisição.",
+    dependencies=[Depends(get_current_user)],
+)
+async def bulk_users(
+    request: BulkUserRequest,
+    user_service: UserService = Depends(get_user_service),
+):
+    """Executa um lote de operações de escrita sobre usuários."""
+    operations = []
+    for op in request.operations:
+        if isinstance(op, BulkCreateOperation):
+            operations.append(BulkOperation(action="create", data=op.user.model_dump()))
+        elif isinstance(op, BulkUpdateOperation):
+            operations.append(
+                BulkOperation(
+                    action="update", user_id=op.id, data=op.user.model_dump(exclude_unset=True)
+                )
+            )
+        else:
+            operations.append(BulkOperation(action="disable", user_id=op.id))
+
+    results = await user_service.bulk_write(operations)
+    succeeded = sum(1 for result in results if result.succeeded)
+    return BulkUserResponse(
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=[result.model_dump() for result in results],
+    )
+
+
 @router.get(
     "",
     response_model=list[UserResponse],
     summary="Listar todos os usuários",
-    description="Retorna uma lista de todos os usuários cadastrados, com a opção de filtrar por status (enabled). Requer autenticação.",
-    response_description="Uma lista contendo os usuários.",
+    description="Retorna uma página de usuários cadastrados (parâmetros 'first' e 'max'), com filtros opcionais por status (enabled), busca textual e campos específicos, aplicados pelo Keycloak. O header 'Link' aponta para a próxima página. Requer autenticação.",
+    response_description="Uma lista contendo os usuários da página.",
     dependencies=[Depends(get_current_user)],
 )
 async def get_all_users(
-    enabled: bool | None = None,
+    request: Request,
+    filters: UserFilter = Depends(user_filter_params),
+    page_params: PageParams = Depends(pagination_params),
     user_service: UserService = Depends(get_user_service),
     _: dict = Depends(get_current_user),
 ):
-    """Retorna uma lista de usuários, com filtros opcionais."""
-    return await user_service.find_all(enabled=enabled)
+    """Retorna uma página de usuários, com filtros opcionais."""
+    page = await user_service.find_page(
+        page_params.first, page_params.max_results, filters
+    )
+    return paginated_response(request, page, _users_json)
+
+
+async def _ndjson_rows(
+    first_page: list[User], pages: AsyncIterator[list[User]]
+) -> AsyncIterator[bytes]:
+    yield _users_json.dump_lines(first_page)
+    async for users in pages:
+        yield _users_json.dump_lines(users)
+
+
+# Declarada antes de "/{user_id}" para que "export" não seja tratado como ID.
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Exportar o diretório de usuários (NDJSON)",
+    description="Transmite todos os usuários que atendem aos filtros, um objeto JSON por linha (application/x-ndjson). As páginas são lidas do Keycloak sob demanda, então o uso de memória não depende do tamanho do realm. Requer autenticação.",
+    response_description="Um usuário por linha, no mesmo formato de GET /users.",
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+    dependencies=[Depends(get_current_user)],
+)
+async def export_users(
+    filters: UserFilter = Depends(user_filter_params),
+    user_service: UserService = Depends(get_user_service),
+):
+    """Exporta os usuários em NDJSON, em streaming."""
+    pages = user_service.iter_users(filters)
+    # A primeira página é lida antes de iniciar a resposta, para que falhas do
+    # Keycloak ainda resultem no status de erro adequado.
+    first_page = await anext(pages, [])
+    return StreamingResponse(
+        _ndjson_rows(first_page, pages), media_type="application/x-ndjson"
+    )
 
 
 @router.get(
@@ -83,7 +199,7 @@ async def get_user_roles(
     user_service: UserService = Depends(get_user_service),
 ):
     """Busca e retorna todos os roles de um usuário específico."""
-    return await user_service.get_user_roles(user_id)
+    return _roles_json.response(await user_service.get_user_roles(user_id))
 
 
 @router.put(
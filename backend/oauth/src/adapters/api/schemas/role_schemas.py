@@ -2,6 +2,8 @@
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from src.config import settings
+
 
 class RoleBase(BaseModel):
     """Schema base para roles, com campos comuns."""
@@ -99,4 +101,47 @@ class UserRolesRequest(BaseModel):
                 ]
             }
         }
-    )
\ No newline at end of file
+    )
+
+
+class BulkRoleAssignmentRequest(BaseModel):
+    """Schema para atribuir/remover os mesmos roles de vários usuários."""
+
+    user_ids: list[str] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BULK_MAX_OPERATIONS,
+        description="IDs dos usuários afetados.",
+    )
+    role_ids: list[str] = Field(
+        ..., min_length=1, description="Lista de IDs de roles a serem gerenciados."
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "user_ids": [
+                    "c2d5049h-6134-6efe-c4da-c8f37g4ca87d",
+                    "d3e6150i-7245-7fgf-d5eb-d9g48h5db98e",
+                ],
+                "role_ids": ["a0b3827f-4912-4cfc-a2b8-a6d15e2a865b"],
+            }
+        }
+    )
+
+
+class RoleAssignmentItemResponse(BaseModel):
+    """Resultado da operação para um usuário do lote."""
+
+    user_id: str
+    status_code: int
+    error_code: str | None = None
+    error_description: str | None = None
+
+
+class BulkRoleAssignmentResponse(BaseModel):
+    """Schema para a resposta de uma atribuição/remoção de roles em lote."""
+
+    succeeded: int
+    failed: int
+    results: list[RoleAssignmentItemResponse]
@@ -1,6 +1,8 @@
-from typing import Optional
+from typing import Annotated, Literal, Optional, Union
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
+from src.config import settings
+
 # ---------------------------------------------------------------------------
 # Constantes para Exemplos
 # ---------------------------------------------------------------------------
@@ -89,6 +91,62 @@ class PasswordUpdateRequest(BaseModel):
     )
 
 
+class BulkCreateOperation(BaseModel):
+    """Criação de um usuário dentro de um lote."""
+
+    action: Literal["create"]
+    user: UserCreateRequest
+
+
+class BulkUpdateOperation(BaseModel):
+    """Atualização de um usuário dentro de um lote."""
+
+    action: Literal["update"]
+    id: str = Field(..., example=EXAMPLE_USER_ID)
+    user: UserUpdateRequest
+
+
+class BulkDisableOperation(BaseModel):
+    """Desativação (exclusão lógica) de um usuário dentro de um lote."""
+
+    action: Literal["disable"]
+    id: str = Field(..., example=EXAMPLE_USER_ID)
+
+
+BulkUserOperation = Annotated[
+    Union[BulkCreateOperation, BulkUpdateOperation, BulkDisableOperation],
+    Field(discriminator="action"),
+]
+
+
+class BulkUserRequest(BaseModel):
+    """Schema para um lote de operações sobre usuários."""
+
+    operations: list[BulkUserOperation] = Field(
+        ..., min_length=1, max_length=settings.BULK_MAX_OPERATIONS
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "operations": [
+                    {
+                        "action": "create",
+                        "user": {
+                            "username": EXAMPLE_USER_EMAIL,
+                            "password": EXAMPLE_USER_PASSWORD,
+                            "firstName": EXAMPLE_USER_FIRST_NAME,
+                            "lastName": EXAMPLE_USER_LAST_NAME,
+                        },
+                    },
+                    {"action": "update", "id": EXAMPLE_USER_ID, "user": {"firstName": "José"}},
+                    {"action": "disable", "id": EXAMPLE_USER_ID},
+                ]
+            }
+        }
+    )
+
+
 # ---------------------------------------------------------------------------
 # Schemas para Respostas (Response Bodies)
 # ---------------------------------------------------------------------------
@@ -141,4 +199,23 @@ class TokenResponse(BaseModel):
                 "token_type": "Bearer",
             }
         }
-    )
\ No newline at end of file
+    )
+
+
+class BulkItemResponse(BaseModel):
+    """Resultado de uma operação do lote (mesma posição da requisição)."""
+
+    index: int
+    action: str
+    status_code: int
+    user_id: Optional[str] = None
+    error_code: Optional[str] = None
+    error_description: Optional[str] = None
+
+
+class BulkUserResponse(BaseModel):
+    """Schema para a resposta de um lote de operações sobre usuários."""
+
+    succeeded: int
+    failed: int
+    results: list[BulkItemResponse]
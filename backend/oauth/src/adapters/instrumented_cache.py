@@ -0,0 +1,104 @@
+import time
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from cachetools import TLRUCache, TTLCache
+from opentelemetry import metrics
+
+_meter = metrics.get_meter("oauth.cache")
+_hits_counter = _meter.create_counter(
+    "oauth_cache_hits", description="Consultas atendidas pelo cache."
+)
+_misses_counter = _meter.create_counter(
+    "oauth_cache_misses", description="Consultas não encontradas no cache."
+)
+_evictions_counter = _meter.create_counter(
+    "oauth_cache_evictions", description="Entradas removidas por falta de espaço."
+)
+
+_MISSING = object()
+
+
+class CacheStats:
+    """Contadores de uso de um cache, também exportados como métricas."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def record_hit(self) -> None:
+        self.hits += 1
+        _hits_counter.add(1, {"cache": self.name})
+
+    def record_miss(self) -> None:
+        self.misses += 1
+        _misses_counter.add(1, {"cache": self.name})
+
+    def record_eviction(self) -> None:
+        self.evictions += 1
+        _evictions_counter.add(1, {"cache": self.name})
+
+    def reset(self) -> None:
+        self.hits = self.misses = self.evictions = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hit_ratio,
+        }
+
+
+class _InstrumentedMixin:
+    stats: CacheStats
+
+    def lookup(self, key: Hashable) -> Any | None:
+        """Como 'get', mas contabiliza acerto/erro nas estatísticas do cache."""
+        value = self.get(key, _MISSING)  # type: ignore[attr-defined]
+        if value is _MISSING:
+            self.stats.record_miss()
+            return None
+        self.stats.record_hit()
+        return value
+
+    def popitem(self) -> tuple[Hashable, Any]:
+        # O cachetools chama 'popitem' apenas quando precisa liberar espaço.
+        item: tuple[Hashable, Any] = super().popitem()  # type: ignore[misc]
+        self.stats.record_eviction()
+        return item
+
+
+class InstrumentedTTLCache(_InstrumentedMixin, TTLCache[Hashable, Any]):
+    """TTLCache com contadores de acertos, erros e evicções."""
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(maxsize=maxsize, ttl=ttl, timer=timer)
+        self.stats = CacheStats(name)
+
+
+class InstrumentedTLRUCache(_InstrumentedMixin, TLRUCache[Hashable, Any]):
+    """TLRUCache (TTL por entrada) com contadores de acertos, erros e evicções."""
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttu: Callable[[Any, Any, float], float],
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(maxsize=maxsize, ttu=ttu, timer=timer)
+        self.stats = CacheStats(name)
@@ -0,0 +1,71 @@
+import time
+
+import httpx
+
+from src.config import settings
+from src.core.exceptions import KeycloakAPIError
+
+from .http_client import get_http_client
+from .singleflight import SingleFlight
+
+# Validade assumida quando o Keycloak não informa 'expires_in'.
+_DEFAULT_EXPIRES_IN = 60.0
+
+
+class AdminTokenManager:
+    """
+    Mantém o token de admin (client_credentials) compartilhado por todo o processo.
+
+    O token é renovado um pouco antes de expirar e chamadas concorrentes
+    compartilham uma única renovação em andamento.
+    """
+
+    def __init__(self) -> None:
+        self._token: str | None = None
+        self._refresh_at: float = 0.0
+        self._singleflight = SingleFlight()
+
+    async def get_token(self) -> str:
+        if self._token and time.monotonic() < self._refresh_at:
+            return self._token
+        return await self._singleflight.do("admin-token", self._fetch_token)
+
+    def invalidate(self, token: str | None = None) -> None:
+        """
+        Descarta o token em cache (ex.: após um 401 do Keycloak).
+
+        Se 'token' for informado, só invalida se ele ainda for o token atual,
+        evitando descartar um token que outro chamador acabou de renovar.
+        """
+        if token is None or token == self._token:
+            self._token = None
+            self._refresh_at = 0.0
+
+    async def _fetch_token(self) -> str:
+        client = get_http_client()
+        data = {
+            "client_id": settings.KEYCLOAK_CLIENT_ID,
+            "client_secret": settings.KEYCLOAK_CLIENT_SECRET,
+            "grant_type": "client_credentials",
+        }
+        try:
+            response = await client.post(settings.keycloak_token_url, data=data)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise KeycloakAPIError(
+                status_code=e.response.status_code,
+                description=f"Erro ao obter token de admin: {e.response.text}",
+            ) from e
+
+        token_data = response.json()
+        expires_in = float(token_data.get("expires_in", _DEFAULT_EXPIRES_IN))
+        # Renova com antecedência, mas nunca antes da metade da validade.
+        lifetime = max(
+            expires_in - settings.KEYCLOAK_ADMIN_TOKEN_REFRESH_MARGIN, expires_in / 2
+        )
+        self._token = token_data["access_token"]
+        self._refresh_at = time.monotonic() + lifetime
+        return self._token
+
+
+admin_token_manager = AdminTokenManager()
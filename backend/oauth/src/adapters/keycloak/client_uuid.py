@@ -0,0 +1,88 @@
+import logging
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from src.config import settings
+from src.core.exceptions import KeycloakAPIError
+
+from .keycloak_client import KeycloakAdminClient
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Mensagens devolvidas pelo Keycloak quando o UUID do client não existe mais
+# (ex.: client recriado no realm); o texto varia entre endpoints e versões.
+_CLIENT_MISSING_MESSAGES = ("could not find client", "client not found")
+
+
+def _is_client_missing(error: KeycloakAPIError) -> bool:
+    if error.status_code != 404:
+        return False
+    description = str(error.description).lower()
+    return any(message in description for message in _CLIENT_MISSING_MESSAGES)
+
+
+class ClientUUIDResolver:
+    """
+    Resolve o UUID interno do client (a partir de KEYCLOAK_CLIENT_ID) uma única
+    vez por processo. Só volta a consultar o Keycloak se ele informar que o
+    client não existe.
+    """
+
+    def __init__(self) -> None:
+        self._uuid: str | None = None
+        self._singleflight = SingleFlight()
+
+    async def get(self, client: KeycloakAdminClient) -> str:
+        if self._uuid:
+            return self._uuid
+        return await self._singleflight.do("client-uuid", lambda: self._resolve(client))
+
+    def invalidate(self, uuid: str | None = None) -> None:
+        """Descarta o UUID; com 'uuid', só se ele ainda for o atual."""
+        if uuid is None or uuid == self._uuid:
+            self._uuid = None
+
+    async def run(
+        self, client: KeycloakAdminClient, call: Callable[[str], Awaitable[T]]
+    ) -> T:
+        """Executa 'call' com o UUID, resolvendo-o de novo se o client sumir."""
+        uuid = await self.get(client)
+        try:
+            return await call(uuid)
+        except KeycloakAPIError as e:
+            if not _is_client_missing(e):
+                raise
+            logger.warning(
+                "Client '%s' não encontrado no Keycloak; resolvendo novamente", uuid
+            )
+            self.invalidate(uuid)
+            return await call(await self.get(client))
+
+    async def resolve_at_startup(self) -> None:
+        """Resolve o UUID na subida; se o Keycloak falhar, fica para o 1º uso."""
+        try:
+            await self.get(KeycloakAdminClient())
+        except Exception:
+            logger.warning(
+                "Não foi possível resolver o UUID do client na subida", exc_info=True
+            )
+
+    async def _resolve(self, client: KeycloakAdminClient) -> str:
+        params = {"clientId": settings.KEYCLOAK_CLIENT_ID}
+        # Usar token de admin para buscar informações do client
+        clients_list = await client.get_with_admin("/clients", params=params)
+
+        if not clients_list:
+            raise KeycloakAPIError(
+                500,
+                f"Client com clientId '{settings.KEYCLOAK_CLIENT_ID}' não encontrado.",
+            )
+
+        self._uuid = clients_list[0]["id"]
+        return self._uuid
+
+
+client_uuid_resolver = ClientUUIDResolver()
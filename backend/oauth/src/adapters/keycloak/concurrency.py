@@ -0,0 +1,27 @@
+import asyncio
+from collections.abc import Awaitable, Iterable
+from typing import Any, TypeVar
+
+from src.config import settings
+
+T = TypeVar("T")
+
+
+async def gather_bounded(
+    aws: Iterable[Awaitable[T]],
+    limit: int | None = None,
+    return_exceptions: bool = False,
+) -> list[Any]:
+    """
+    Equivalente a asyncio.gather, mas com no máximo 'limit' awaitables em
+    execução ao mesmo tempo (padrão: settings.KEYCLOAK_MAX_FANOUT).
+    """
+    semaphore = asyncio.Semaphore(limit or settings.KEYCLOAK_MAX_FANOUT)
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(
+        *(run(aw) for aw in aws), return_exceptions=return_exceptions
+    )
@@ -0,0 +1,79 @@
+import importlib.util
+import logging
+
+import httpx
+
+from src.config import settings
+
+from .resilience import GuardedTransport
+
+logger = logging.getLogger(__name__)
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 só é usado se habilitado no Settings e com o pacote 'h2' instalado."""
+    if not settings.KEYCLOAK_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning(
+            "KEYCLOAK_HTTP2 habilitado, mas o pacote 'h2' não está instalado; "
+            "usando HTTP/1.1"
+        )
+        return False
+    return True
+
+
+def _build_transport(http2: bool) -> httpx.AsyncHTTPTransport:
+    """
+    Cria o transporte com o pool configurado no Settings. Com 'http2', o h2 é
+    oferecido via ALPN e o HTTP/1.1 continua disponível se o Keycloak não o
+    negociar (ou se a conexão não usar TLS).
+    """
+    limits = httpx.Limits(
+        max_connections=settings.KEYCLOAK_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.KEYCLOAK_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.KEYCLOAK_HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncHTTPTransport(limits=limits, http1=True, http2=http2)
+
+
+def _build_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=settings.KEYCLOAK_HTTP_CONNECT_TIMEOUT,
+        read=settings.KEYCLOAK_HTTP_READ_TIMEOUT,
+        write=settings.KEYCLOAK_HTTP_WRITE_TIMEOUT,
+        pool=settings.KEYCLOAK_HTTP_POOL_TIMEOUT,
+    )
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Cria o cliente HTTP com pool de conexões configurado a partir do Settings."""
+    transport = GuardedTransport(_build_transport(_http2_enabled()))
+    return httpx.AsyncClient(transport=transport, timeout=_build_timeout())
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """Abre o cliente compartilhado. Chamado no lifespan da aplicação."""
+    return get_http_client()
+
+
+async def close_http_client() -> None:
+    """Fecha o cliente compartilhado e libera as conexões do pool."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Retorna o cliente HTTP compartilhado usado por todo o tráfego com o Keycloak.
+
+    Fora do lifespan (scripts, testes) o cliente é criado sob demanda.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+    return _http_client
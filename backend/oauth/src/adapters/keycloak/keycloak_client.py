@@ -4,33 +4,28 @@ import httpx
 
 from src.config import settings
 from src.core.exceptions import KeycloakAPIError
+from .admin_token import admin_token_manager
+from .http_client import get_http_client
+from .read_coalescer import read_coalescer
+from .request_loader import RequestLoader
+from .retry import RetryBudget, send_idempotent
+
+
+def _read_key(scope: str, endpoint: str, params: Dict | None) -> tuple:
+    return (scope, endpoint, tuple(sorted(params.items())) if params else ())
 
 
 class KeycloakAdminClient:
     def __init__(self, user_token: str | None = None):
         self.base_url = settings.keycloak_admin_api_url
-        self._admin_token: str | None = None
         self._user_token: str | None = user_token
+        # O client vive uma requisição: leituras repetidas nela são memoizadas.
+        self.loader = RequestLoader()
+        self.retry_budget = RetryBudget(settings.KEYCLOAK_RETRY_REQUEST_BUDGET)
 
     async def _get_admin_token(self) -> str:
-        if self._admin_token:
-            return self._admin_token
-        async with httpx.AsyncClient() as client:
-            data = {
-                "client_id": settings.KEYCLOAK_CLIENT_ID,
-                "client_secret": settings.KEYCLOAK_CLIENT_SECRET,
-                "grant_type": "client_credentials",
-            }
-            try:
-                response = await client.post(settings.keycloak_token_url, data=data)
-                response.raise_for_status()
-                self._admin_token = response.json()["access_token"]
-                return self._admin_token
-            except httpx.HTTPStatusError as e:
-                raise KeycloakAPIError(
-                    status_code=e.response.status_code,
-                    description=f"Erro ao obter token de admin: {e.response.text}",
-                )
+        """Obtém o token de admin compartilhado pelo processo."""
+        return await admin_token_manager.get_token()
 
     async def _get_token(self, use_admin: bool = False) -> str:
         """
@@ -48,70 +43,123 @@ class KeycloakAdminClient:
         """
         Faz uma requisição GET usando token de admin (para operações que requerem admin).
         """
+        key = _read_key("admin", endpoint, params)
+        return await self.loader.load(
+            key,
+            lambda: read_coalescer.do(
+                "admin", key, lambda: self._get_with_admin(endpoint, params)
+            ),
+        )
+
+    async def _get_with_admin(self, endpoint: str, params: Dict | None) -> Any:
         token = await self._get_admin_token()
         headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}{endpoint}", headers=headers, params=params
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                raise KeycloakAPIError(
-                    status_code=e.response.status_code,
-                    description=f"Erro na API do Keycloak: {e.response.text}",
+        url = f"{self.base_url}{endpoint}"
+        try:
+            response = await self._send("GET", url, headers, idempotent=True, params=params)
+            if response.status_code == 401:
+                # Token de admin revogado/expirado antes do previsto: renovar e repetir
+                admin_token_manager.invalidate(token)
+                token = await self._get_admin_token()
+                headers["Authorization"] = f"Bearer {token}"
+                response = await self._send(
+                    "GET", url, headers, idempotent=True, params=params
                 )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            raise KeycloakAPIError(
+                status_code=e.response.status_code,
+                description=f"Erro na API do Keycloak: {e.response.text}",
+            )
+
+    async def _send(
+        self, method: str, url: str, headers: Dict, idempotent: bool, **kwargs: Any
+    ) -> httpx.Response:
+        """
+        Envia a chamada; leituras idempotentes são repetidas em falhas
+        transitórias, dentro do orçamento de retentativas da requisição.
+        """
+        client = get_http_client()
+        if not idempotent:
+            return await client.request(method, url, headers=headers, **kwargs)
+        return await send_idempotent(
+            lambda: client.request(method, url, headers=headers, **kwargs),
+            hedge_key="admin",
+            budget=self.retry_budget,
+        )
 
     async def _request(
-        self, method: str, endpoint: str, **kwargs: Any
+        self, method: str, endpoint: str, idempotent: bool = False, **kwargs: Any
     ) -> httpx.Response:
         token = await self._get_token()
         headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.request(
-                    method, f"{self.base_url}{endpoint}", headers=headers, **kwargs
-                )
-                response.raise_for_status()
-                return response
-            except httpx.HTTPStatusError as e:
-                # Se usar token de usuário e receber 401, não tentar refresh
-                if e.response.status_code == 401 and self._user_token:
-                    raise KeycloakAPIError(
-                        status_code=e.response.status_code,
-                        description=f"Token do usuário inválido ou sem permissões: {e.response.text}",
-                    )
-                # Se usar token de admin e receber 401, tentar refresh
-                if e.response.status_code == 401:
-                    self._admin_token = None
-                    token = await self._get_admin_token()
-                    headers["Authorization"] = f"Bearer {token}"
-                    response = await client.request(
-                        method, f"{self.base_url}{endpoint}", headers=headers, **kwargs
-                    )
-                    response.raise_for_status()
-                    return response
+        url = f"{self.base_url}{endpoint}"
+        try:
+            response = await self._send(method, url, headers, idempotent, **kwargs)
+            response.raise_for_status()
+            return response
+        except httpx.HTTPStatusError as e:
+            # Se usar token de usuário e receber 401, não tentar refresh
+            if e.response.status_code == 401 and self._user_token:
                 raise KeycloakAPIError(
                     status_code=e.response.status_code,
-                    description=f"Erro na API do Keycloak: {e.response.text}",
+                    description=f"Token do usuário inválido ou sem permissões: {e.response.text}",
                 )
+            # Se usar token de admin e receber 401, tentar refresh
+            if e.response.status_code == 401:
+                admin_token_manager.invalidate(token)
+                token = await self._get_admin_token()
+                headers["Authorization"] = f"Bearer {token}"
+                response = await self._send(method, url, headers, idempotent, **kwargs)
+                response.raise_for_status()
+                return response
+            raise KeycloakAPIError(
+                status_code=e.response.status_code,
+                description=f"Erro na API do Keycloak: {e.response.text}",
+            )
+
+    async def get(
+        self, endpoint: str, params: Dict | None = None, memoize: bool = True
+    ) -> Any:
+        """
+        GET com o token da requisição. Com 'memoize=False' (leituras paginadas)
+        o resultado não fica retido até o fim da requisição.
+        """
+        key = _read_key("user", endpoint, params)
+        # Fora da requisição, só leituras com o mesmo token são agrupadas.
+        def shared_read() -> Any:
+            return read_coalescer.do(
+                "user", (key, self._user_token), lambda: self._get(endpoint, params)
+            )
+
+        if not memoize:
+            return await shared_read()
+        return await self.loader.load(key, shared_read)
 
-    async def get(self, endpoint: str, params: Dict | None = None) -> Any:
-        response = await self._request("GET", endpoint, params=params)
+    async def _get(self, endpoint: str, params: Dict | None) -> Any:
+        response = await self._request("GET", endpoint, idempotent=True, params=params)
         return response.json()
 
+    async def _write(self, method: str, endpoint: str, json: Dict | None) -> httpx.Response:
+        try:
+            return await self._request(method, endpoint, json=json)
+        finally:
+            # Leituras memoizadas podem ter sido invalidadas pela escrita.
+            self.loader.clear()
+            read_coalescer.invalidate()
+
     async def post(self, endpoint: str, json: Dict | None = None) -> httpx.Response:
-        return await self._request("POST", endpoint, json=json)
+        return await self._write("POST", endpoint, json)
 
     async def put(self, endpoint: str, json: Dict | None = None) -> None:
-        await self._request("PUT", endpoint, json=json)
+        await self._write("PUT", endpoint, json)
 
     async def delete(self, endpoint: str, json: Dict | None = None) -> None:
-        await self._request("DELETE", endpoint, json=json)
+        await self._write("DELETE", endpoint, json)
@@ -1,37 +1,38 @@
 # Onde: oauth_api/adapters/db/keycloak_role_repository.py
 
-import asyncio
-from typing import Any, Dict, List, Optional
+from collections.abc import Awaitable, Callable
+from typing import Any, Dict, List, Optional, TypeVar
 
+from src.core.domain.bulk import RoleAssignmentResult
+from src.core.domain.page import Page
 from src.core.domain.role import Role
-from src.core.exceptions import KeycloakAPIError, NotFoundError
+from src.config import settings
+from src.core.exceptions import (
+    BaseAPIException,
+    ConflictAlreadyExistsError,
+    KeycloakAPIError,
+    NotFoundError,
+)
 from src.core.ports.role_repository import IRoleRepository
-from src.config import settings  # Importar settings
+from .client_uuid import client_uuid_resolver
+from .concurrency import gather_bounded
 from .keycloak_client import KeycloakAdminClient
+from .role_catalog import role_catalog
+
+T = TypeVar("T")
 
 
 class KeycloakRoleRepository(IRoleRepository):
     def __init__(self, client: KeycloakAdminClient):
         self.client = client
-        self._client_uuid: Optional[str] = None  # Cache para o UUID do client
 
     async def _get_client_uuid(self) -> str:
-        """Busca e armazena em cache o UUID interno do client a partir do client_id."""
-        if self._client_uuid:
-            return self._client_uuid
-
-        params = {"clientId": settings.KEYCLOAK_CLIENT_ID}
-        # Usar token de admin para buscar informações do client
-        clients_list = await self.client.get_with_admin("/clients", params=params)
-
-        if not clients_list:
-            raise KeycloakAPIError(
-                500,
-                f"Client com clientId '{settings.KEYCLOAK_CLIENT_ID}' não encontrado.",
-            )
+        """Retorna o UUID interno do client, resolvido uma única vez por processo."""
+        return await client_uuid_resolver.get(self.client)
 
-        self._client_uuid = clients_list[0]["id"]
-        return self._client_uuid
+    async def _client_scoped(self, call: Callable[[str], Awaitable[T]]) -> T:
+        """Executa 'call' com o UUID do client (re-resolvido se o Keycloak não o encontrar)."""
+        return await client_uuid_resolver.run(self.client, call)
 
     def _to_domain(self, kc_role: Dict) -> Role:
         """Converte a representação do Keycloak para o modelo de domínio."""
@@ -46,76 +47,152 @@ class KeycloakRoleRepository(IRoleRepository):
             enabled=enabled,
         )
 
+    async def _load_catalog(self) -> List[Role]:
+        """Busca todos os client roles no Keycloak para (re)carregar o catálogo."""
+        # Usar token de admin (endpoint requer permissões administrativas)
+        kc_roles_list = await self._client_scoped(
+            lambda client_uuid: self.client.get_with_admin(f"/clients/{client_uuid}/roles")
+        )
+        return [self._to_domain(role) for role in kc_roles_list]
+
     async def find_by_id(self, role_id: str) -> Role | None:
         """
         Busca um client role pelo seu ID.
-        Como a API não suporta busca direta por ID, listamos todos e filtramos.
+        Consulta o catálogo compartilhado; em caso de ausência (ex.: role criado por
+        outra instância), busca diretamente em /roles-by-id.
+        """
+        await role_catalog.ensure_loaded(self._load_catalog)
+        role = role_catalog.get_by_id(role_id)
+        if role:
+            return role
+
+        try:
+            kc_role = await self.client.get_with_admin(f"/roles-by-id/{role_id}")
+        except KeycloakAPIError as e:
+            if e.status_code == 404:
+                return None
+            raise
+        # /roles-by-id também devolve realm roles e roles de outros clients.
+        client_uuid = await self._get_client_uuid()
+        if not kc_role.get("clientRole") or kc_role.get("containerId") != client_uuid:
+            return None
+        role = self._to_domain(kc_role)
+        role_catalog.upsert(role)
+        return role
+
+    async def find_by_ids(self, role_ids: List[str]) -> List[Role]:
+        """
+        Busca vários client roles pelos IDs, na ordem pedida, com uma única
+        passada pelo catálogo. Só os ausentes dele são buscados individualmente.
         """
-        all_roles = await self.find_all()
-        for role in all_roles:
-            if role.id == role_id:
-                return role
-        return None
+        await role_catalog.ensure_loaded(self._load_catalog)
+        roles = [role_catalog.get_by_id(role_id) for role_id in role_ids]
+        missing = [i for i, role in enumerate(roles) if role is None]
+        if missing:
+            found = await gather_bounded(self.find_by_id(role_ids[i]) for i in missing)
+            for i, role in zip(missing, found):
+                roles[i] = role
+        return [role for role in roles if role]
 
     async def find_by_name(self, role_name: str) -> Role | None:
         """Busca um client role pelo seu nome."""
+        await role_catalog.ensure_loaded(self._load_catalog)
+        role = role_catalog.get_by_name(role_name)
+        if role:
+            return role
+
         try:
-            client_uuid = await self._get_client_uuid()
             # Usar token de admin (endpoint requer permissões administrativas)
-            kc_role = await self.client.get_with_admin(f"/clients/{client_uuid}/roles/{role_name}")
-            return self._to_domain(kc_role)
+            kc_role = await self._client_scoped(
+                lambda client_uuid: self.client.get_with_admin(
+                    f"/clients/{client_uuid}/roles/{role_name}"
+                )
+            )
         except KeycloakAPIError as e:
             if e.status_code == 404:
                 return None
             raise
+        role = self._to_domain(kc_role)
+        role_catalog.upsert(role)
+        return role
 
     async def find_all(self, enabled: Optional[bool] = None) -> List[Role]:
         """Busca todos os client roles."""
-        client_uuid = await self._get_client_uuid()
-        # Usar token de admin (endpoint requer permissões administrativas)
-        kc_roles_list = await self.client.get_with_admin(f"/clients/{client_uuid}/roles")
-
-        all_roles = [self._to_domain(role) for role in kc_roles_list]
+        await role_catalog.ensure_loaded(self._load_catalog)
+        all_roles = role_catalog.all()
 
         if enabled is None:
             return all_roles
 
         return [role for role in all_roles if role.enabled == enabled]
 
+    async def find_page(
+        self,
+        first: int,
+        max_results: int,
+        enabled: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> Page[Role]:
+        """
+        Retorna uma página de client roles, ordenados por nome.
+        A página é recortada do catálogo, que já está em memória; por isso os
+        filtros são aplicados localmente, sem nova chamada ao Keycloak ('enabled'
+        é um atributo, que a API de roles não sabe filtrar).
+        """
+        roles = await self.find_all(enabled)
+        if search:
+            # Mesma semântica do parâmetro 'search' do Keycloak para roles.
+            term = search.lower()
+            roles = [role for role in roles if term in role.name.lower()]
+        roles.sort(key=lambda role: role.name)
+        return Page(
+            items=roles[first : first + max_results],
+            first=first,
+            max=max_results,
+            has_more=first + max_results < len(roles),
+            total=len(roles),
+        )
+
     async def find_roles_by_user_id(self, user_id: str) -> list[Role]:
         """Busca os client roles de um usuário no Keycloak."""
         try:
-            client_uuid = await self._get_client_uuid()
             # Usar token de admin (endpoint requer permissões administrativas)
-            kc_roles = await self.client.get_with_admin(
-                f"/users/{user_id}/role-mappings/clients/{client_uuid}"
+            kc_roles = await self._client_scoped(
+                lambda client_uuid: self.client.get_with_admin(
+                    f"/users/{user_id}/role-mappings/clients/{client_uuid}"
+                )
             )
-
-            # A lógica para buscar detalhes e filtrar por 'enabled' permanece útil
-            detailed_roles = []
-            tasks = [self.find_by_name(role_mapping["name"]) for role_mapping in kc_roles]
-            results = await asyncio.gather(*tasks)
-            
-            for role_details in results:
-                if role_details and role_details.enabled:
-                    detailed_roles.append(role_details)
-
-            return detailed_roles
         except KeycloakAPIError as e:
             if e.status_code == 404:
                 raise NotFoundError(f"Usuário com ID '{user_id}' não encontrado.") from e
             raise
 
+        # Os mapeamentos não trazem o atributo 'enabled'; os detalhes vêm do catálogo.
+        roles = await self.find_by_ids([mapping["id"] for mapping in kc_roles])
+        return [role for role in roles if role.enabled]
+
     async def create(self, role_data: Any) -> Role:
         """Cria um novo client role com o atributo 'enabled'."""
-        client_uuid = await self._get_client_uuid()
         kc_payload = {
             "name": role_data["name"],
             "description": role_data.get("description"),
             "attributes": {"enabled": [str(role_data.get("enabled", True)).lower()]},
         }
-        await self.client.post(f"/clients/{client_uuid}/roles", json=kc_payload)
+        try:
+            await self._client_scoped(
+                lambda client_uuid: self.client.post(
+                    f"/clients/{client_uuid}/roles", json=kc_payload
+                )
+            )
+        except KeycloakAPIError as e:
+            # O conflito é detectado na própria escrita, sem consulta prévia.
+            if e.status_code == 409:
+                raise ConflictAlreadyExistsError(
+                    f"Role com o nome '{role_data['name']}' já existe."
+                ) from e
+            raise
 
+        # O Location de um client role traz só o nome; o ID exige uma leitura.
         created_role = await self.find_by_name(role_data["name"])
         if not created_role:
             raise KeycloakAPIError(500, "Não foi possível recuperar o role recém-criado.")
@@ -131,11 +208,20 @@ class KeycloakRoleRepository(IRoleRepository):
         kc_payload = updated_role_data.model_dump(include={"name", "description"})
         kc_payload["attributes"] = {"enabled": [str(updated_role_data.enabled).lower()]}
         
-        client_uuid = await self._get_client_uuid()
         # O endpoint de update para client roles usa o NOME do role, não o ID.
-        await self.client.put(
-            f"/clients/{client_uuid}/roles/{role_to_update.name}", json=kc_payload
-        )
+        try:
+            await self._client_scoped(
+                lambda client_uuid: self.client.put(
+                    f"/clients/{client_uuid}/roles/{role_to_update.name}", json=kc_payload
+                )
+            )
+        except KeycloakAPIError as e:
+            if e.status_code == 404:
+                # Removido ou renomeado por outra instância depois do catálogo.
+                role_catalog.remove(role_to_update)
+                raise NotFoundError(f"Role com ID '{role_id}' não encontrado.") from e
+            raise
+        role_catalog.upsert(updated_role_data)
 
         # Retorna os dados atualizados
         return updated_role_data
@@ -155,16 +241,62 @@ class KeycloakRoleRepository(IRoleRepository):
 
     async def add_roles_to_user(self, user_id: str, roles: List[Role]) -> None:
         """Adiciona client roles a um usuário."""
-        client_uuid = await self._get_client_uuid()
         kc_roles = [{"id": role.id, "name": role.name} for role in roles]
-        await self.client.post(
-            f"/users/{user_id}/role-mappings/clients/{client_uuid}", json=kc_roles
+        await self._client_scoped(
+            lambda client_uuid: self.client.post(
+                f"/users/{user_id}/role-mappings/clients/{client_uuid}", json=kc_roles
+            )
         )
 
     async def remove_roles_from_user(self, user_id: str, roles: List[Role]) -> None:
         """Remove client roles de um usuário."""
-        client_uuid = await self._get_client_uuid()
         kc_roles = [{"id": role.id, "name": role.name} for role in roles]
-        await self.client.delete(
-            f"/users/{user_id}/role-mappings/clients/{client_uuid}", json=kc_roles
-        )
\ No newline at end of file
+        await self._client_scoped(
+            lambda client_uuid: self.client.delete(
+                f"/users/{user_id}/role-mappings/clients/{client_uuid}", json=kc_roles
+            )
+        )
+
+    async def add_roles_to_users(
+        self, user_ids: List[str], roles: List[Role]
+    ) -> List[RoleAssignmentResult]:
+        """Adiciona client roles a vários usuários, em paralelo limitado."""
+        return await self._map_roles_for_users(user_ids, roles, self.client.post)
+
+    async def remove_roles_from_users(
+        self, user_ids: List[str], roles: List[Role]
+    ) -> List[RoleAssignmentResult]:
+        """Remove client roles de vários usuários, em paralelo limitado."""
+        return await self._map_roles_for_users(user_ids, roles, self.client.delete)
+
+    async def _map_roles_for_users(
+        self,
+        user_ids: List[str],
+        roles: List[Role],
+        method: Callable[..., Awaitable[Any]],
+    ) -> List[RoleAssignmentResult]:
+        kc_roles = [{"id": role.id, "name": role.name} for role in roles]
+
+        async def apply(user_id: str) -> RoleAssignmentResult:
+            try:
+                await self._client_scoped(
+                    lambda client_uuid: method(
+                        f"/users/{user_id}/role-mappings/clients/{client_uuid}", json=kc_roles
+                    )
+                )
+            except Exception as e:
+                if isinstance(e, KeycloakAPIError) and e.status_code == 404:
+                    e = NotFoundError(f"Usuário com ID '{user_id}' não encontrado.")
+                elif not isinstance(e, BaseAPIException):
+                    e = KeycloakAPIError(502, f"Falha ao comunicar com o Keycloak: {e}")
+                return RoleAssignmentResult(
+                    user_id=user_id,
+                    status_code=e.status_code,
+                    error_code=e.error_code,
+                    error_description=e.description,
+                )
+            return RoleAssignmentResult(user_id=user_id, status_code=204)
+
+        return await gather_bounded(
+            (apply(user_id) for user_id in user_ids), limit=settings.BULK_MAX_CONCURRENCY
+        )
@@ -1,42 +1,34 @@
 # Onde: oauth_api/adapters/db/keycloak_user_repository.py
 
-from typing import Dict, List, Optional
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any, Dict, List, Optional
 
-from src.core.domain.user import User
+from src.config import settings
+from src.core.domain.bulk import BulkItemResult, BulkOperation
+from src.core.domain.page import Page
+from src.core.domain.user import User, UserFilter
 from src.core.exceptions import (
+    BaseAPIException,
     ConflictAlreadyExistsError,
     KeycloakAPIError,
     NotFoundError,
 )
 from src.core.ports.user_repository import IUserRepository
-from src.config import settings  # Importar settings
+
+from .client_uuid import client_uuid_resolver
 from .keycloak_client import KeycloakAdminClient
 
+# Respostas do partialImport que indicam que ele não está disponível (ou
+# recusou o bloco inteiro) e que nada foi importado.
+_IMPORT_UNAVAILABLE_STATUS = frozenset({400, 403, 404})
+
 
 class KeycloakUserRepository(IUserRepository):
     _USERS_ENDPOINT = "/users"
 
     def __init__(self, client: KeycloakAdminClient):
         self.client = client
-        self._client_uuid: Optional[str] = None  # Cache para o UUID do client
-
-    async def _get_client_uuid(self) -> str:
-        """Busca e armazena em cache o UUID interno do client a partir do client_id."""
-        if self._client_uuid:
-            return self._client_uuid
-
-        params = {"clientId": settings.KEYCLOAK_CLIENT_ID}
-        # Usar token de admin para buscar informações do client
-        clients_list = await self.client.get_with_admin("/clients", params=params)
-
-        if not clients_list:
-            raise KeycloakAPIError(
-                500,
-                f"Client com clientId '{settings.KEYCLOAK_CLIENT_ID}' não encontrado.",
-            )
-
-        self._client_uuid = clients_list[0]["id"]
-        return self._client_uuid
 
     def _to_domain(self, kc_user: Dict) -> User:
         return User(
@@ -64,31 +56,117 @@ class KeycloakUserRepository(IUserRepository):
         return self._to_domain(kc_users[0])
 
     async def find_all(self, enabled: Optional[bool] = None) -> List[User]:
-        kc_users = await self.client.get(self._USERS_ENDPOINT)
-        all_users = [self._to_domain(user) for user in kc_users]
+        """Percorre todas as páginas de usuários (sem 'max' o Keycloak trunca a lista)."""
+        all_users: List[User] = []
+        async for users in self.iter_pages(UserFilter(enabled=enabled)):
+            all_users.extend(users)
+        return all_users
+
+    async def iter_pages(
+        self, filters: Optional[UserFilter] = None
+    ) -> AsyncIterator[List[User]]:
+        """
+        Percorre todos os usuários em páginas de PAGE_SIZE_MAX. A próxima página
+        é buscada enquanto o consumidor processa a atual.
+        """
+        page_size = settings.PAGE_SIZE_MAX
+        next_page = asyncio.ensure_future(self.find_page(0, page_size, filters))
+        try:
+            while True:
+                page = await next_page
+                if page.has_more:
+                    next_page = asyncio.ensure_future(
+                        self.find_page(page.first + len(page.items), page_size, filters)
+                    )
+                yield page.items
+                if not page.has_more:
+                    return
+        finally:
+            # Consumidor desistiu no meio (ex.: cliente desconectou).
+            next_page.cancel()
 
-        if enabled is None:
-            return all_users
+    @staticmethod
+    def _filter_params(filters: UserFilter) -> Dict:
+        """Traduz os filtros para os query params do endpoint /users do Keycloak."""
+        params: Dict = {}
+        if filters.enabled is not None:
+            params["enabled"] = str(filters.enabled).lower()
+        for name, kc_name in (
+            ("search", "search"),
+            ("username", "username"),
+            ("email", "email"),
+            ("first_name", "firstName"),
+            ("last_name", "lastName"),
+        ):
+            value = getattr(filters, name)
+            if value:
+                params[kc_name] = value
+        if filters.exact:
+            params["exact"] = "true"
+        return params
 
-        filtered_users = [user for user in all_users if user.enabled == enabled]
-        return filtered_users
+    async def find_page(
+        self, first: int, max_results: int, filters: Optional[UserFilter] = None
+    ) -> Page[User]:
+        # Pede um item a mais para saber se existe próxima página sem um /count.
+        params: Dict = {"first": first, "max": max_results + 1, "briefRepresentation": "true"}
+        params.update(self._filter_params(filters or UserFilter()))
+        # Páginas não são memoizadas: percorrer o diretório mantém memória constante.
+        kc_users = await self.client.get(self._USERS_ENDPOINT, params=params, memoize=False)
+        return Page(
+            items=[self._to_domain(user) for user in kc_users[:max_results]],
+            first=first,
+            max=max_results,
+            has_more=len(kc_users) > max_results,
+        )
 
     async def find_users_by_role_name(self, role_name: str) -> List[User]:
         """Busca usuários associados a um client role específico no Keycloak."""
-        try:
-            client_uuid = await self._get_client_uuid()
-            # Este endpoint retorna os usuários para um client role específico
-            kc_users = await self.client.get(
-                f"/clients/{client_uuid}/roles/{role_name}/users"
-            )
-            return [self._to_domain(user) for user in kc_users]
-        except KeycloakAPIError as e:
-            if e.status_code == 404:
-                return []
-            raise
+        all_users: List[User] = []
+        async for users in self.iter_users_by_role_name(role_name):
+            all_users.extend(users)
+        return all_users
 
-    async def create(self, user_data: dict) -> User:
-        kc_payload = {
+    async def iter_users_by_role_name(
+        self, role_name: str
+    ) -> AsyncIterator[List[User]]:
+        """
+        Percorre, em páginas de PAGE_SIZE_MAX, os usuários de um client role
+        (sem 'max' o Keycloak devolve só a primeira página).
+        """
+        page_size = settings.PAGE_SIZE_MAX
+        first = 0
+        while True:
+            try:
+                kc_users = await self._role_users_page(role_name, first, page_size)
+            except KeycloakAPIError as e:
+                if e.status_code == 404:
+                    return
+                raise
+            if kc_users:
+                yield [self._to_domain(user) for user in kc_users]
+            if len(kc_users) < page_size:
+                return
+            first += page_size
+
+    async def _role_users_page(
+        self, role_name: str, first: int, page_size: int
+    ) -> List[Dict[str, Any]]:
+        params = {"first": first, "max": page_size}
+        # Este endpoint retorna os usuários para um client role específico
+        users: List[Dict[str, Any]] = await client_uuid_resolver.run(
+            self.client,
+            lambda client_uuid: self.client.get(
+                f"/clients/{client_uuid}/roles/{role_name}/users",
+                params=params,
+                memoize=False,
+            ),
+        )
+        return users
+
+    @staticmethod
+    def _create_payload(user_data: dict) -> Dict:
+        return {
             "username": user_data["username"],
             "email": user_data["username"],
             "firstName": user_data["first_name"],
@@ -98,12 +176,40 @@ class KeycloakUserRepository(IUserRepository):
                 {"type": "password", "value": user_data["password"], "temporary": False}
             ],
         }
+
+    @staticmethod
+    def _update_payload(user_data: dict) -> Dict:
+        keycloak_field_map = {
+            "username": "username",
+            "first_name": "firstName",
+            "last_name": "lastName",
+            "enabled": "enabled",
+        }
+        kc_payload = {}
+        for domain_field, kc_field in keycloak_field_map.items():
+            if domain_field in user_data:
+                kc_payload[kc_field] = user_data[domain_field]
+        if "username" in kc_payload:
+            kc_payload["email"] = kc_payload["username"]
+        return kc_payload
+
+    async def create(self, user_data: dict) -> User:
+        kc_payload = self._create_payload(user_data)
         try:
             response = await self.client.post(self._USERS_ENDPOINT, json=kc_payload)
             user_location = response.headers.get("location")
             if not user_location:
                 raise KeycloakAPIError(500, "Header 'Location' não encontrado.")
             user_id = user_location.split("/")[-1]
+            if not settings.KEYCLOAK_CREATE_READ_BACK:
+                # O Keycloak guarda username e e-mail em minúsculas.
+                return User(
+                    id=user_id,
+                    username=kc_payload["username"].lower(),
+                    first_name=kc_payload["firstName"],
+                    last_name=kc_payload["lastName"],
+                    enabled=kc_payload["enabled"],
+                )
             found_user = await self.find_by_id(user_id)
             if not found_user:
                 raise KeycloakAPIError(500, "Falha ao buscar usuário recém-criado.")
@@ -113,30 +219,215 @@ class KeycloakUserRepository(IUserRepository):
                 raise ConflictAlreadyExistsError() from e
             raise
 
+    async def _put_existing(self, user_id: str, endpoint: str, payload: Dict) -> None:
+        """
+        Escreve em um usuário existente. No modo otimista, o 404 do próprio PUT
+        vira NotFoundError; caso contrário, a existência é checada antes.
+        """
+        if not settings.KEYCLOAK_OPTIMISTIC_WRITES:
+            await self.find_by_id(user_id)
+        try:
+            await self.client.put(endpoint, json=payload)
+        except KeycloakAPIError as e:
+            if e.status_code == 404:
+                raise NotFoundError() from e
+            raise
+
     async def update(self, user_id: str, user_data: dict) -> None:
-        await self.find_by_id(user_id)
-        keycloak_field_map = {
-            "username": "username",
-            "first_name": "firstName",
-            "last_name": "lastName",
-            "enabled": "enabled",
-        }
-        kc_payload = {}
-        for domain_field, kc_field in keycloak_field_map.items():
-            if domain_field in user_data:
-                kc_payload[kc_field] = user_data[domain_field]
-        if "username" in kc_payload:
-            kc_payload["email"] = kc_payload["username"]
-        if kc_payload:
-            await self.client.put(f"{self._USERS_ENDPOINT}/{user_id}", json=kc_payload)
+        kc_payload = self._update_payload(user_data)
+        if not kc_payload:
+            # Nada a escrever: só confirma que o usuário existe.
+            await self.find_by_id(user_id)
+            return
+        await self._put_existing(user_id, f"{self._USERS_ENDPOINT}/{user_id}", kc_payload)
 
     async def reset_password(self, user_id: str, new_password: str) -> None:
-        await self.find_by_id(user_id)
         payload = {"type": "password", "value": new_password, "temporary": False}
-        await self.client.put(
-            f"{self._USERS_ENDPOINT}/{user_id}/reset-password", json=payload
+        await self._put_existing(
+            user_id, f"{self._USERS_ENDPOINT}/{user_id}/reset-password", payload
         )
 
     async def disable(self, user_id: str) -> None:
-        await self.find_by_id(user_id)
-        await self.client.put(f"{self._USERS_ENDPOINT}/{user_id}", json={"enabled": False})
\ No newline at end of file
+        await self._put_existing(
+            user_id, f"{self._USERS_ENDPOINT}/{user_id}", {"enabled": False}
+        )
+
+    async def bulk_write(self, operations: List[BulkOperation]) -> List[BulkItemResult]:
+        """
+        Executa um lote de criações, atualizações e desativações com no máximo
+        BULK_MAX_CONCURRENCY chamadas simultâneas ao Keycloak. Criações vão em
+        blocos via partialImport; atualizações e desativações são um PUT cada,
+        sem leitura prévia.
+        """
+        # Um único semáforo por lote limita cada chamada ao Keycloak, inclusive
+        # as criações individuais do fallback do partialImport.
+        semaphore = asyncio.Semaphore(settings.BULK_MAX_CONCURRENCY)
+        creates = [(i, op) for i, op in enumerate(operations) if op.action == "create"]
+        chunk_size = settings.BULK_IMPORT_CHUNK_SIZE
+        tasks = [
+            self._bulk_import(creates[start : start + chunk_size], semaphore)
+            for start in range(0, len(creates), chunk_size)
+        ]
+        tasks += [
+            self._bulk_put(i, op, semaphore)
+            for i, op in enumerate(operations)
+            if op.action != "create"
+        ]
+        batches = await asyncio.gather(*tasks)
+        results = [result for batch in batches for result in batch]
+        return sorted(results, key=lambda result: result.index)
+
+    @staticmethod
+    def _bulk_error(
+        index: int, op: BulkOperation, error: Exception, user_id: str | None = None
+    ) -> BulkItemResult:
+        if isinstance(error, KeycloakAPIError) and error.status_code == 409:
+            error = ConflictAlreadyExistsError()
+        elif isinstance(error, NotFoundError) or (
+            isinstance(error, KeycloakAPIError) and error.status_code == 404
+        ):
+            error = NotFoundError(f"Usuário com ID '{user_id}' não encontrado.")
+        if not isinstance(error, BaseAPIException):
+            error = KeycloakAPIError(502, f"Falha ao comunicar com o Keycloak: {error}")
+        return BulkItemResult(
+            index=index,
+            action=op.action,
+            status_code=error.status_code,
+            user_id=user_id,
+            error_code=error.error_code,
+            error_description=error.description,
+        )
+
+    async def _bulk_put(
+        self, index: int, op: BulkOperation, semaphore: asyncio.Semaphore
+    ) -> List[BulkItemResult]:
+        user_id = op.user_id
+        assert user_id is not None  # Obrigatório no schema de 'update' e 'disable'.
+        if op.action == "update":
+            payload = self._update_payload(op.data)
+        else:
+            payload = {"enabled": False}
+        try:
+            async with semaphore:
+                if payload:
+                    await self.client.put(
+                        f"{self._USERS_ENDPOINT}/{user_id}", json=payload
+                    )
+                else:
+                    # Como em 'update': sem nada a escrever, só confirma que
+                    # o usuário existe.
+                    await self.find_by_id(user_id)
+        except Exception as e:
+            return [self._bulk_error(index, op, e, user_id)]
+        return [
+            BulkItemResult(
+                index=index, action=op.action, status_code=200, user_id=user_id
+            )
+        ]
+
+    async def _bulk_import(
+        self, creates: List[tuple[int, BulkOperation]], semaphore: asyncio.Semaphore
+    ) -> List[BulkItemResult]:
+        """Cria um bloco de usuários com uma única chamada de partialImport."""
+        results: List[BulkItemResult] = []
+        pending: Dict[str, tuple[int, BulkOperation]] = {}
+        for index, op in creates:
+            # O Keycloak normaliza usernames para minúsculas.
+            username = op.data["username"].lower()
+            if username in pending:
+                results.append(
+                    self._bulk_error(index, op, ConflictAlreadyExistsError())
+                )
+            else:
+                pending[username] = (index, op)
+
+        body = {
+            # SKIP: usuários já existentes são ignorados (reportados como conflito)
+            # em vez de abortar o bloco inteiro.
+            "ifResourceExists": "SKIP",
+            "users": [self._create_payload(op.data) for _, op in pending.values()],
+        }
+        try:
+            async with semaphore:
+                response = await self.client.post("/partialImport", json=body)
+            import_results = response.json().get("results", [])
+        except KeycloakAPIError as e:
+            if e.status_code in _IMPORT_UNAVAILABLE_STATUS:
+                # Sem partialImport (permissão, versão ou usuário inválido no
+                # bloco): nada foi importado, então cria um a um.
+                individual = await asyncio.gather(
+                    *(
+                        self._bulk_create_one(index, op, semaphore)
+                        for index, op in pending.values()
+                    )
+                )
+                return results + individual
+            return results + self._import_failed(pending, e)
+        except Exception as e:
+            return results + self._import_failed(pending, e)
+        return results + self._import_results(import_results, pending)
+
+    def _import_results(
+        self,
+        import_results: List[Dict[str, Any]],
+        pending: Dict[str, tuple[int, BulkOperation]],
+    ) -> List[BulkItemResult]:
+        """Associa o resultado do partialImport a cada item do bloco."""
+        results: List[BulkItemResult] = []
+        for item in import_results:
+            if item.get("resourceType") != "USER":
+                continue
+            username = item.get("resourceName", "").lower()
+            if username not in pending:
+                continue
+            index, op = pending.pop(username)
+            if item.get("action") == "SKIPPED":
+                results.append(
+                    self._bulk_error(index, op, ConflictAlreadyExistsError())
+                )
+            else:
+                results.append(
+                    BulkItemResult(
+                        index=index,
+                        action="create",
+                        status_code=201,
+                        user_id=item.get("id"),
+                    )
+                )
+        missing = KeycloakAPIError(
+            500, "Usuário ausente no resultado do partialImport."
+        )
+        results.extend(
+            self._bulk_error(index, op, missing) for index, op in pending.values()
+        )
+        return results
+
+    def _import_failed(
+        self, pending: Dict[str, tuple[int, BulkOperation]], error: Exception
+    ) -> List[BulkItemResult]:
+        """
+        Timeout, erro de rede ou 5xx no partialImport: o Keycloak pode já ter
+        importado o bloco, então os itens não são reenviados (viriam como 409).
+        """
+        if not isinstance(error, KeycloakAPIError) or error.status_code >= 500:
+            error = KeycloakAPIError(
+                502,
+                "Resultado do partialImport desconhecido; o usuário pode ter sido "
+                f"criado: {getattr(error, 'description', error)}",
+            )
+        return [self._bulk_error(index, op, error) for index, op in pending.values()]
+
+    async def _bulk_create_one(
+        self, index: int, op: BulkOperation, semaphore: asyncio.Semaphore
+    ) -> BulkItemResult:
+        try:
+            async with semaphore:
+                response = await self.client.post(
+                    self._USERS_ENDPOINT, json=self._create_payload(op.data)
+                )
+        except Exception as e:
+            return self._bulk_error(index, op, e)
+        user_id = response.headers.get("location", "").split("/")[-1] or None
+        return BulkItemResult(
+            index=index, action="create", status_code=201, user_id=user_id
+        )
@@ -0,0 +1,66 @@
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Any
+
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+from .singleflight import SingleFlight
+
+_meter = metrics.get_meter("oauth.keycloak")
+_reads_counter = _meter.create_counter(
+    "oauth_keycloak_reads", description="Leituras ao Keycloak pedidas pelo gateway."
+)
+_coalesced_counter = _meter.create_counter(
+    "oauth_keycloak_reads_coalesced",
+    description="Leituras atendidas por uma chamada idêntica já em andamento.",
+)
+
+
+class ReadCoalescer:
+    """
+    Agrupa, em todo o processo, GETs idênticos em andamento numa única chamada
+    ao Keycloak cujo resultado é entregue a todos os que aguardam.
+
+    Uma escrita ao Keycloak chama 'invalidate': leituras iniciadas depois dela
+    não aproveitam chamadas disparadas antes, que podem não refletir a escrita.
+    """
+
+    def __init__(self) -> None:
+        self._flight = SingleFlight()
+        self._generation = 0
+        self.reads = 0
+        self.coalesced = 0
+
+    @property
+    def ratio(self) -> float:
+        return self.coalesced / self.reads if self.reads else 0.0
+
+    async def do(self, scope: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        key = (self._generation, key)
+        self.reads += 1
+        _reads_counter.add(1, {"scope": scope})
+        if self._flight.in_flight(key):
+            self.coalesced += 1
+            _coalesced_counter.add(1, {"scope": scope})
+        return await self._flight.do(key, fn)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+
+    def reset(self) -> None:
+        self.invalidate()
+        self.reads = self.coalesced = 0
+
+
+read_coalescer = ReadCoalescer()
+
+
+def _observe_ratio(_: CallbackOptions) -> Iterable[Observation]:
+    yield Observation(read_coalescer.ratio)
+
+
+_meter.create_observable_gauge(
+    "oauth_keycloak_coalescing_ratio",
+    callbacks=[_observe_ratio],
+    description="Fração das leituras ao Keycloak atendidas por chamadas já em andamento.",
+)
@@ -0,0 +1,39 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class RequestLoader:
+    """
+    Memoiza leituras ao Keycloak durante uma requisição.
+
+    Leituras idênticas (mesma chave) são feitas uma única vez: chamadas
+    concorrentes compartilham a mesma execução e chamadas posteriores recebem
+    o resultado já obtido. Falhas não são memoizadas. Os resultados são
+    compartilhados e não devem ser modificados por quem os recebe.
+    """
+
+    def __init__(self) -> None:
+        self._results: dict[Hashable, asyncio.Future[Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def load(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._results.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(fn())
+            self._results[key] = future
+            future.add_done_callback(lambda f: self._forget_failure(key, f))
+        else:
+            self.hits += 1
+        return await asyncio.shield(future)
+
+    def clear(self) -> None:
+        """Descarta as leituras memoizadas (após uma escrita)."""
+        self._results.clear()
+
+    def _forget_failure(self, key: Hashable, future: asyncio.Future[Any]) -> None:
+        if future.cancelled() or future.exception() is not None:
+            if self._results.get(key) is future:
+                del self._results[key]
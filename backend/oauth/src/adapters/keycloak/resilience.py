@@ -0,0 +1,251 @@
+import time
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+
+import httpx
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+from src.config import settings
+from src.core.exceptions import KeycloakAPIError
+
+ENDPOINT_CLASSES = ("token", "admin", "certs", "introspect")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """
+    Abre após 'failure_threshold' falhas seguidas e recusa chamadas por
+    'reset_timeout' segundos. Depois disso deixa passar uma única chamada de
+    teste (meio-aberto): sucesso fecha o circuito, falha o reabre.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        elapsed = self._clock() - self._opened_at
+        if self._state == OPEN and elapsed >= self.reset_timeout:
+            self._state = HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._state = CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = OPEN
+            self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """Libera a chamada de teste que terminou sem resultado (ex.: cancelada)."""
+        self._probe_in_flight = False
+
+
+class AdaptiveLimiter:
+    """
+    Limite de chamadas simultâneas com AIMD: cresce uma unidade a cada resposta
+    rápida enquanto o limite está em uso e é multiplicado por 'backoff_ratio'
+    quando a latência passa de 'latency_target' ou o Keycloak falha.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        latency_target: float,
+        backoff_ratio: float,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float | None = None, overloaded: bool = False) -> None:
+        in_use = self.in_flight
+        self.in_flight -= 1
+        if overloaded or (latency is not None and latency > self.latency_target):
+            self.limit = max(float(self.minimum), self.limit * self.backoff_ratio)
+        elif latency is not None and in_use * 2 >= self.limit:
+            self.limit = min(float(self.maximum), self.limit + 1)
+
+
+class UpstreamGuard:
+    """Circuit breaker e limite adaptativo de uma classe de endpoint do Keycloak."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.breaker = CircuitBreaker(
+            settings.KEYCLOAK_BREAKER_FAILURE_THRESHOLD,
+            settings.KEYCLOAK_BREAKER_RESET_TIMEOUT,
+        )
+        self.limiter = AdaptiveLimiter(
+            initial=settings.KEYCLOAK_LIMIT_INITIAL,
+            minimum=settings.KEYCLOAK_LIMIT_MIN,
+            maximum=settings.KEYCLOAK_LIMIT_MAX,
+            latency_target=settings.KEYCLOAK_LIMIT_LATENCY_TARGET,
+            backoff_ratio=settings.KEYCLOAK_LIMIT_BACKOFF_RATIO,
+        )
+
+    async def call(
+        self, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """
+        Executa 'send' se o circuito e o limite permitirem; caso contrário falha
+        imediatamente com KeycloakAPIError 503, sem enfileirar a chamada.
+        """
+        if not self.breaker.allow():
+            self._reject("circuit_open", "circuito aberto")
+        if not self.limiter.try_acquire():
+            self.breaker.release()
+            self._reject("concurrency_limit", "limite de chamadas simultâneas atingido")
+
+        started = time.monotonic()
+        healthy: bool | None = None
+        try:
+            response = await send()
+            # 4xx é uma resposta válida do Keycloak; só 5xx indica sobrecarga.
+            healthy = response.status_code < 500
+            return response
+        except httpx.TransportError:
+            healthy = False
+            raise
+        finally:
+            latency = time.monotonic() - started
+            if healthy is None:
+                self.breaker.release()
+                self.limiter.release()
+            elif healthy:
+                self.breaker.record_success()
+                self.limiter.release(latency)
+            else:
+                self.breaker.record_failure()
+                self.limiter.release(latency, overloaded=True)
+
+    def _reject(self, reason: str, detail: str) -> None:
+        _rejections_counter.add(1, {"endpoint": self.name, "reason": reason})
+        raise KeycloakAPIError(
+            status_code=503,
+            description=f"Keycloak indisponível ({self.name}): {detail}.",
+        )
+
+
+def endpoint_class(url: str) -> str:
+    """Classifica a URL de uma chamada ao Keycloak em uma das ENDPOINT_CLASSES."""
+    if url.startswith(settings.keycloak_jwks_url):
+        return "certs"
+    token_url = settings.keycloak_token_url
+    if url.startswith(f"{token_url}/introspect"):
+        return "introspect"
+    if url.startswith(token_url):
+        return "token"
+    return "admin"
+
+
+class UpstreamGuards:
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Recria os guardas com as configurações atuais (estado zerado)."""
+        self._guards = {name: UpstreamGuard(name) for name in ENDPOINT_CLASSES}
+
+    def get(self, name: str) -> UpstreamGuard:
+        return self._guards[name]
+
+    def for_url(self, url: str) -> UpstreamGuard:
+        return self._guards[endpoint_class(url)]
+
+    def __iter__(self) -> Iterator[UpstreamGuard]:
+        return iter(self._guards.values())
+
+
+upstream_guards = UpstreamGuards()
+
+
+class GuardedTransport(httpx.AsyncBaseTransport):
+    """Transporte que passa cada chamada pelo guarda da sua classe de endpoint."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport) -> None:
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        guard = upstream_guards.for_url(str(request.url))
+        return await guard.call(lambda: self._transport.handle_async_request(request))
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _observe_breaker_state(_: CallbackOptions) -> Iterable[Observation]:
+    for guard in upstream_guards:
+        yield Observation(_STATE_VALUES[guard.breaker.state], {"endpoint": guard.name})
+
+
+def _observe_limit(_: CallbackOptions) -> Iterable[Observation]:
+    for guard in upstream_guards:
+        yield Observation(int(guard.limiter.limit), {"endpoint": guard.name})
+
+
+def _observe_in_flight(_: CallbackOptions) -> Iterable[Observation]:
+    for guard in upstream_guards:
+        yield Observation(guard.limiter.in_flight, {"endpoint": guard.name})
+
+
+_meter = metrics.get_meter("oauth.keycloak")
+_rejections_counter = _meter.create_counter(
+    "oauth_keycloak_rejections",
+    description="Chamadas ao Keycloak recusadas pelo circuit breaker ou pelo limite.",
+)
+_meter.create_observable_gauge(
+    "oauth_keycloak_circuit_state",
+    callbacks=[_observe_breaker_state],
+    description="Estado do circuit breaker (0 fechado, 1 meio-aberto, 2 aberto).",
+)
+_meter.create_observable_gauge(
+    "oauth_keycloak_concurrency_limit",
+    callbacks=[_observe_limit],
+    description="Limite adaptativo de chamadas simultâneas ao Keycloak.",
+)
+_meter.create_observable_gauge(
+    "oauth_keycloak_in_flight",
+    callbacks=[_observe_in_flight],
+    description="Chamadas ao Keycloak em andamento.",
+)
@@ -0,0 +1,189 @@
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+
+import httpx
+from opentelemetry import metrics
+
+from src.config import settings
+
+# Respostas que indicam falha transitória do Keycloak.
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+_RETRY_AFTER_STATUS = frozenset({429, 503})
+_RETRYABLE_ERRORS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+)
+
+_meter = metrics.get_meter("oauth.keycloak")
+_retries_counter = _meter.create_counter(
+    "oauth_keycloak_retries",
+    description="Leituras ao Keycloak repetidas após falha transitória.",
+)
+_hedges_counter = _meter.create_counter(
+    "oauth_keycloak_hedges",
+    description="Leituras ao Keycloak duplicadas por passarem do p95.",
+)
+
+Send = Callable[[], Awaitable[httpx.Response]]
+
+
+class LatencyTracker:
+    """Janela das latências mais recentes de uma classe de leitura."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self) -> float | None:
+        """Retorna o p95 observado, ou None enquanto houver poucas amostras."""
+        if len(self._samples) < settings.KEYCLOAK_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+latency_trackers: defaultdict[str, LatencyTracker] = defaultdict(LatencyTracker)
+
+
+class RetryBudget:
+    """
+    Retentativas que todas as leituras de uma mesma requisição podem gastar
+    juntas, para que uma requisição com muitas leituras não multiplique a
+    carga sobre um Keycloak já degradado.
+    """
+
+    def __init__(self, retries: int) -> None:
+        self.remaining = retries
+
+    def try_spend(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+def _backoff(attempt: int) -> float:
+    """Backoff exponencial com jitter completo."""
+    ceiling = min(
+        settings.KEYCLOAK_RETRY_BACKOFF_MAX,
+        settings.KEYCLOAK_RETRY_BACKOFF_BASE * 2 ** (attempt - 1),
+    )
+    # Jitter de espera, não criptográfico.
+    return random.uniform(0, ceiling)  # noqa: S311
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    """Lê o Retry-After (segundos ou data HTTP) de respostas 429/503."""
+    if response.status_code not in _RETRY_AFTER_STATUS:
+        return None
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _can_retry(
+    attempt: int, delay: float, deadline: float, budget: RetryBudget | None
+) -> bool:
+    return (
+        attempt < settings.KEYCLOAK_RETRY_MAX_ATTEMPTS
+        and time.monotonic() + delay < deadline
+        and (budget is None or budget.try_spend())
+    )
+
+
+async def _timed(send: Send, tracker: LatencyTracker | None) -> httpx.Response:
+    started = time.monotonic()
+    response = await send()
+    if tracker is not None:
+        tracker.record(time.monotonic() - started)
+    return response
+
+
+async def _hedged(send: Send, tracker: LatencyTracker) -> httpx.Response:
+    """
+    Dispara uma segunda chamada se a primeira passar do p95 observado e fica
+    com a primeira que responder; a outra é cancelada.
+    """
+    delay = tracker.p95()
+    if delay is None:
+        return await _timed(send, tracker)
+
+    first = asyncio.ensure_future(_timed(send, tracker))
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result()
+
+    _hedges_counter.add(1)
+    pending = {first, asyncio.ensure_future(_timed(send, tracker))}
+    error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        # As duas chamadas terminaram e nenhuma respondeu: ambas falharam.
+        assert error is not None
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def send_idempotent(
+    send: Send, hedge_key: str | None = None, budget: RetryBudget | None = None
+) -> httpx.Response:
+    """
+    Executa uma leitura idempotente repetindo falhas transitórias (erros de
+    conexão, timeouts, 429/502/503/504) com backoff exponencial com jitter.
+
+    As tentativas respeitam KEYCLOAK_RETRY_MAX_ATTEMPTS e o orçamento de tempo
+    KEYCLOAK_RETRY_BUDGET; com 'budget', cada retentativa também consome uma
+    unidade do orçamento da requisição. O Retry-After de 429/503 substitui o
+    backoff. Se 'hedge_key' for informado e o hedging estiver habilitado, cada
+    tentativa usa hedging com o p95 das leituras dessa classe. Esgotadas as
+    tentativas, a última resposta é retornada (ou o último erro é lançado).
+    """
+    tracker = latency_trackers[hedge_key] if hedge_key else None
+    hedge_tracker = tracker if settings.KEYCLOAK_HEDGE_ENABLED else None
+    deadline = time.monotonic() + settings.KEYCLOAK_RETRY_BUDGET
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            if hedge_tracker is not None:
+                response = await _hedged(send, hedge_tracker)
+            else:
+                response = await _timed(send, tracker)
+        except _RETRYABLE_ERRORS:
+            delay = _backoff(attempt)
+            if not _can_retry(attempt, delay, deadline, budget):
+                raise
+            reason = "transport_error"
+        else:
+            if response.status_code not in RETRYABLE_STATUS:
+                return response
+            retry_after = _retry_after(response)
+            delay = _backoff(attempt) if retry_after is None else retry_after
+            if not _can_retry(attempt, delay, deadline, budget):
+                return response
+            reason = str(response.status_code)
+        _retries_counter.add(1, {"reason": reason})
+        await asyncio.sleep(delay)
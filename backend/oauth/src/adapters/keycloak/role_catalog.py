@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from src.config import settings
+from src.core.domain.role import Role
+
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+RoleLoader = Callable[[], Awaitable[list[Role]]]
+
+_LOAD_KEY = "role-catalog"
+
+
+class RoleCatalog:
+    """
+    Catálogo de client roles compartilhado pelo processo.
+
+    Mantém índices id -> Role e nome -> Role carregados uma única vez e
+    recarregados em segundo plano. Escritas feitas pelo repositório atualizam
+    o catálogo imediatamente, inclusive se uma recarga estiver em andamento.
+    """
+
+    def __init__(self) -> None:
+        self._by_id: dict[str, Role] = {}
+        self._by_name: dict[str, Role] = {}
+        self._loaded_at: float | None = None
+        # Escritas ocorridas durante uma recarga, reaplicadas ao final dela.
+        self._pending_writes: list[tuple[str, Role]] = []
+        self._singleflight = SingleFlight()
+        self._background_task: asyncio.Task[None] | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    async def ensure_loaded(self, loader: RoleLoader) -> None:
+        """Carrega o catálogo se preciso; se estiver velho, recarrega em 2º plano."""
+        if self._loaded_at is None:
+            await self.reload(loader)
+            return
+        age = time.monotonic() - self._loaded_at
+        if age >= settings.ROLE_CATALOG_MAX_AGE:
+            await self.reload(loader)
+        elif age >= settings.ROLE_CATALOG_REFRESH_INTERVAL:
+            self._reload_in_background(loader)
+
+    async def reload(self, loader: RoleLoader) -> None:
+        """Recarrega o catálogo; chamadas concorrentes compartilham a mesma carga."""
+        await self._singleflight.do(_LOAD_KEY, lambda: self._load(loader))
+
+    def get_by_id(self, role_id: str) -> Role | None:
+        return self._by_id.get(role_id)
+
+    def get_by_name(self, role_name: str) -> Role | None:
+        return self._by_name.get(role_name)
+
+    def all(self) -> list[Role]:
+        return list(self._by_id.values())
+
+    def upsert(self, role: Role) -> None:
+        self._apply("upsert", role)
+        if self._singleflight.in_flight(_LOAD_KEY):
+            self._pending_writes.append(("upsert", role))
+
+    def remove(self, role: Role) -> None:
+        self._apply("remove", role)
+        if self._singleflight.in_flight(_LOAD_KEY):
+            self._pending_writes.append(("remove", role))
+
+    def invalidate(self) -> None:
+        """Descarta o catálogo; a próxima leitura o recarrega."""
+        self._by_id = {}
+        self._by_name = {}
+        self._loaded_at = None
+        self._pending_writes = []
+
+    def _apply(self, action: str, role: Role) -> None:
+        previous = self._by_id.pop(role.id, None)
+        if previous is not None and self._by_name.get(previous.name) is previous:
+            del self._by_name[previous.name]
+        if action == "upsert":
+            self._by_id[role.id] = role
+            self._by_name[role.name] = role
+
+    async def _load(self, loader: RoleLoader) -> None:
+        try:
+            roles = await loader()
+            self._by_id = {role.id: role for role in roles}
+            self._by_name = {role.name: role for role in roles}
+            self._loaded_at = time.monotonic()
+            for action, role in self._pending_writes:
+                self._apply(action, role)
+        finally:
+            # Se a carga falhar, as escritas já estão no catálogo atual; mantê-las
+            # na fila as reaplicaria sobre uma carga futura, mais recente.
+            self._pending_writes = []
+
+    def _reload_in_background(self, loader: RoleLoader) -> None:
+        if self._singleflight.in_flight(_LOAD_KEY):
+            return
+        self._background_task = asyncio.ensure_future(self._reload_quietly(loader))
+
+    async def _reload_quietly(self, loader: RoleLoader) -> None:
+        try:
+            await self.reload(loader)
+        except Exception:
+            # O catálogo atual continua sendo servido; a próxima leitura tenta de novo.
+            logger.warning("Falha ao recarregar o catálogo de roles", exc_info=True)
+
+
+role_catalog = RoleCatalog()
@@ -0,0 +1,37 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Garante no máximo uma execução em andamento por chave.
+
+    Chamadas concorrentes com a mesma chave aguardam a execução já em
+    andamento e recebem o mesmo resultado (ou a mesma exceção).
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Future[Any]] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        # 'shield' impede que o cancelamento de um chamador cancele a execução
+        # compartilhada pelos demais.
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future[Any]) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Marca a exceção como consumida caso todos os chamadores tenham desistido.
+        if not future.cancelled():
+            future.exception()
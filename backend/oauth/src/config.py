@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,6 +10,107 @@ class Settings(BaseSettings):
     KEYCLOAK_CLIENT_SECRET: str
     KEYCLOAK_TOKEN_ALGORITHM: str = "RS256"
 
+    # Pool de conexões HTTP compartilhado com o Keycloak
+    KEYCLOAK_HTTP_MAX_CONNECTIONS: int = 100
+    KEYCLOAK_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    KEYCLOAK_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    KEYCLOAK_HTTP_CONNECT_TIMEOUT: float = 5.0
+    KEYCLOAK_HTTP_READ_TIMEOUT: float = 10.0
+    KEYCLOAK_HTTP_WRITE_TIMEOUT: float = 10.0
+    KEYCLOAK_HTTP_POOL_TIMEOUT: float = 5.0
+    # HTTP/2 com o Keycloak (requer o pacote 'h2'); sem negociação de h2 a
+    # conexão continua em HTTP/1.1.
+    KEYCLOAK_HTTP2: bool = False
+
+    # Segundos de antecedência para renovar o token de admin antes de expirar
+    KEYCLOAK_ADMIN_TOKEN_REFRESH_MARGIN: float = 30.0
+
+    # Cache de tokens já verificados (a validade de cada entrada é limitada pelo 'exp')
+    TOKEN_CACHE_MAXSIZE: int = 10_000
+    TOKEN_CACHE_TTL: float = 300.0
+
+    # JWKS: após JWKS_REFRESH_INTERVAL as chaves antigas continuam sendo servidas
+    # enquanto a nova busca roda em segundo plano; após JWKS_MAX_AGE a busca é
+    # obrigatória. 'kid' desconhecido força uma nova busca no máximo a cada
+    # JWKS_UNKNOWN_KID_MIN_INTERVAL segundos.
+    JWKS_REFRESH_INTERVAL: float = 600.0
+    JWKS_MAX_AGE: float = 86_400.0
+    JWKS_UNKNOWN_KID_MIN_INTERVAL: float = 30.0
+
+    # Modo do POST /validate: 'introspection' consulta o Keycloak sempre,
+    # 'local' valida a assinatura com o JWKS e 'hybrid' valida localmente e só
+    # consulta o Keycloak para tokens a menos de TOKEN_HYBRID_INTROSPECT_WINDOW
+    # segundos de expirar ou quando solicitado explicitamente.
+    TOKEN_VALIDATION_MODE: Literal["introspection", "local", "hybrid"] = "introspection"
+    TOKEN_HYBRID_INTROSPECT_WINDOW: float = 60.0
+
+    # Cache de resultados da introspecção: positivos (limitados pelo 'exp' do
+    # token) e negativos (tokens inativos), este com validade curta.
+    INTROSPECTION_CACHE_MAXSIZE: int = 10_000
+    INTROSPECTION_CACHE_TTL: float = 60.0
+    INTROSPECTION_NEGATIVE_CACHE_MAXSIZE: int = 10_000
+    INTROSPECTION_NEGATIVE_CACHE_TTL: float = 5.0
+
+    # Catálogo de client roles: recarregado em segundo plano após
+    # ROLE_CATALOG_REFRESH_INTERVAL e obrigatoriamente após ROLE_CATALOG_MAX_AGE.
+    ROLE_CATALOG_REFRESH_INTERVAL: float = 60.0
+    ROLE_CATALOG_MAX_AGE: float = 600.0
+
+    # Número máximo de chamadas simultâneas ao Keycloak disparadas por uma
+    # única operação (fan-out).
+    KEYCLOAK_MAX_FANOUT: int = 10
+
+    # Paginação das listagens (first/max). PAGE_SIZE_MAX também é o tamanho de
+    # página usado para percorrer o Keycloak internamente.
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 500
+
+    # Operações em lote (POST /users/bulk): tamanho máximo do lote, chamadas
+    # simultâneas ao Keycloak e usuários por chamada de partialImport.
+    BULK_MAX_OPERATIONS: int = 5000
+    BULK_MAX_CONCURRENCY: int = 8
+    BULK_IMPORT_CHUNK_SIZE: int = 200
+
+    # Escritas otimistas: envia o PUT direto e converte o 404 do Keycloak em
+    # NotFoundError, em vez de buscar o recurso antes só para checar existência.
+    KEYCLOAK_OPTIMISTIC_WRITES: bool = True
+
+    # Modo estrito de criação: relê o usuário criado no Keycloak em vez de montar
+    # a resposta a partir do payload e do ID do header Location.
+    KEYCLOAK_CREATE_READ_BACK: bool = False
+
+    # Proteção por classe de endpoint (token, admin, certs, introspect): o
+    # circuito abre após KEYCLOAK_BREAKER_FAILURE_THRESHOLD falhas seguidas e
+    # recusa chamadas por KEYCLOAK_BREAKER_RESET_TIMEOUT segundos. O limite de
+    # chamadas simultâneas se ajusta (AIMD) entre KEYCLOAK_LIMIT_MIN e
+    # KEYCLOAK_LIMIT_MAX, recuando quando a latência passa de
+    # KEYCLOAK_LIMIT_LATENCY_TARGET segundos.
+    KEYCLOAK_BREAKER_FAILURE_THRESHOLD: int = 5
+    KEYCLOAK_BREAKER_RESET_TIMEOUT: float = 30.0
+    KEYCLOAK_LIMIT_INITIAL: int = 20
+    KEYCLOAK_LIMIT_MIN: int = 2
+    KEYCLOAK_LIMIT_MAX: int = 100
+    KEYCLOAK_LIMIT_LATENCY_TARGET: float = 2.0
+    KEYCLOAK_LIMIT_BACKOFF_RATIO: float = 0.9
+
+    # Retentativas das leituras idempotentes (GETs e JWKS): até
+    # KEYCLOAK_RETRY_MAX_ATTEMPTS tentativas com backoff exponencial com jitter
+    # (base KEYCLOAK_RETRY_BACKOFF_BASE, teto KEYCLOAK_RETRY_BACKOFF_MAX), sem
+    # passar de KEYCLOAK_RETRY_BUDGET segundos por leitura. O Retry-After de
+    # 429/503 é respeitado dentro do mesmo orçamento.
+    KEYCLOAK_RETRY_MAX_ATTEMPTS: int = 3
+    KEYCLOAK_RETRY_BACKOFF_BASE: float = 0.1
+    KEYCLOAK_RETRY_BACKOFF_MAX: float = 2.0
+    KEYCLOAK_RETRY_BUDGET: float = 5.0
+    # Total de retentativas somadas entre todas as leituras de uma mesma
+    # requisição ao gateway; esgotado, as leituras seguintes não são repetidas.
+    KEYCLOAK_RETRY_REQUEST_BUDGET: int = 5
+
+    # Hedging das leituras da API admin: uma segunda chamada é disparada quando
+    # a primeira passa do p95 observado (após KEYCLOAK_HEDGE_MIN_SAMPLES amostras).
+    KEYCLOAK_HEDGE_ENABLED: bool = False
+    KEYCLOAK_HEDGE_MIN_SAMPLES: int = 20
+
     @property
     def keycloak_token_url(self) -> str:
         return f"{self.KEYCLOAK_SERVER_URL}/realms/{self.KEYCLOAK_REALM}/protocol/openid-connect/token"
@@ -0,0 +1,41 @@
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+BulkAction = Literal["create", "update", "disable"]
+
+
+class BulkOperation(BaseModel):
+    """Uma operação de escrita dentro de um lote."""
+
+    action: BulkAction
+    user_id: str | None = None  # Obrigatório para 'update' e 'disable'.
+    data: dict[str, Any] = {}
+
+
+class BulkItemResult(BaseModel):
+    """Resultado de uma operação do lote, na mesma posição da requisição."""
+
+    index: int
+    action: BulkAction
+    status_code: int
+    user_id: str | None = None
+    error_code: str | None = None
+    error_description: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status_code < 400
+
+
+class RoleAssignmentResult(BaseModel):
+    """Resultado da atribuição/remoção de roles para um usuário de um lote."""
+
+    user_id: str
+    status_code: int
+    error_code: str | None = None
+    error_description: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status_code < 400
@@ -0,0 +1,15 @@
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Uma página de resultados de uma listagem paginada."""
+
+    items: list[T]
+    first: int
+    max: int
+    has_more: bool
+    total: int | None = None  # Só preenchido quando o total é conhecido sem custo extra.
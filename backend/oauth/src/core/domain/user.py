@@ -7,3 +7,15 @@ class User(BaseModel):
     first_name: str
     last_name: str
     enabled: bool
+
+
+class UserFilter(BaseModel):
+    """Filtros da listagem de usuários, com a mesma semântica da API do Keycloak."""
+
+    enabled: bool | None = None
+    search: str | None = None  # Busca em username, e-mail, nome e sobrenome.
+    username: str | None = None
+    email: str | None = None
+    first_name: str | None = None
+    last_name: str | None = None
+    exact: bool = False  # Igualdade exata em vez de busca por substring.
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 
 # A importação de 'Role' de outro módulo está correta.
+from src.core.domain.bulk import RoleAssignmentResult
+from src.core.domain.page import Page
 from src.core.domain.role import Role 
 
 # A linha "from src.core.ports.role_repository import IRoleRepository" foi removida.
@@ -18,11 +20,27 @@ class IRoleRepository(ABC):
         """Retorna todos os roles."""
         raise NotImplementedError
 
+    @abstractmethod
+    async def find_page(
+        self,
+        first: int,
+        max_results: int,
+        enabled: bool | None = None,
+        search: str | None = None,
+    ) -> Page[Role]:
+        """Retorna uma página de roles, ordenados por nome."""
+        raise NotImplementedError
+
     @abstractmethod
     async def find_by_id(self, role_id: str) -> Role | None:
         """Busca um role pelo seu ID."""
         raise NotImplementedError
 
+    @abstractmethod
+    async def find_by_ids(self, role_ids: list[str]) -> list[Role]:
+        """Busca vários roles pelos IDs; IDs inexistentes são omitidos do resultado."""
+        raise NotImplementedError
+
     @abstractmethod
     async def find_by_name(self, name: str) -> Role | None:
         """Busca um role pelo seu nome."""
@@ -51,4 +69,18 @@ class IRoleRepository(ABC):
     @abstractmethod
     async def remove_roles_from_user(self, user_id: str, roles: list[Role]) -> None:
         """Remove uma lista de roles de um usuário."""
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_roles_to_users(
+        self, user_ids: list[str], roles: list[Role]
+    ) -> list[RoleAssignmentResult]:
+        """Adiciona os roles a vários usuários, com um resultado por usuário."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def remove_roles_from_users(
+        self, user_ids: list[str], roles: list[Role]
+    ) -> list[RoleAssignmentResult]:
+        """Remove os roles de vários usuários, com um resultado por usuário."""
+        raise NotImplementedError
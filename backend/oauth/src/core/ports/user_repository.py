@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from typing import List, Optional
 
-from src.core.domain.user import User
+from src.core.domain.bulk import BulkItemResult, BulkOperation
+from src.core.domain.page import Page
+from src.core.domain.user import User, UserFilter
 
 
 class IUserRepository(ABC):
@@ -16,11 +19,29 @@ class IUserRepository(ABC):
     @abstractmethod
     async def find_all(self, enabled: Optional[bool] = None) -> List[User]:
         raise NotImplementedError
+
+    @abstractmethod
+    async def find_page(
+        self, first: int, max_results: int, filters: Optional[UserFilter] = None
+    ) -> Page[User]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_pages(
+        self, filters: Optional[UserFilter] = None
+    ) -> AsyncIterator[List[User]]:
+        """Percorre todos os usuários, uma página por vez."""
+        raise NotImplementedError
     
     @abstractmethod
     async def find_users_by_role_name(self, role_name: str) -> List[User]:
         raise NotImplementedError
 
+    @abstractmethod
+    def iter_users_by_role_name(self, role_name: str) -> AsyncIterator[List[User]]:
+        """Percorre os usuários que possuem o role, uma página por vez."""
+        raise NotImplementedError
+
     @abstractmethod
     async def create(self, user_data: dict) -> User:
         raise NotImplementedError
@@ -35,4 +56,9 @@ class IUserRepository(ABC):
 
     @abstractmethod
     async def disable(self, user_id: str) -> None:
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_write(self, operations: List[BulkOperation]) -> List[BulkItemResult]:
+        """Executa um lote de operações de escrita, com um resultado por item."""
+        raise NotImplementedError
@@ -1,9 +1,18 @@
+import logging
 from typing import Optional
+from src.core.domain.bulk import RoleAssignmentResult
+from src.core.domain.page import Page
 from src.core.domain.role import Role
-from src.core.exceptions import ConflictAlreadyExistsError, NotFoundError
+from src.core.exceptions import KeycloakAPIError, NotFoundError
 from src.core.ports.role_repository import IRoleRepository
 from src.core.ports.user_repository import IUserRepository # Importar
 
+logger = logging.getLogger(__name__)
+
+# Quantidade de usuários por etapa da remoção em cascata (o progresso é
+# registrado ao fim de cada etapa).
+_CASCADE_CHUNK_SIZE = 500
+
 
 class RoleService:
     """Serviço contendo a lógica de negócio para roles."""
@@ -17,12 +26,10 @@ class RoleService:
         self.user_repository = user_repository
 
     async def create_role(self, role_data: dict) -> Role:
-        """Cria um novo role, garantindo que o nome não seja duplicado."""
-        existing_role = await self.role_repository.find_by_name(role_data["name"])
-        if existing_role:
-            raise ConflictAlreadyExistsError(
-                f"Role com o nome '{role_data['name']}' já existe."
-            )
+        """
+        Cria um novo role. Nomes duplicados são recusados pelo próprio Keycloak
+        na escrita, e o repositório lança ConflictAlreadyExistsError.
+        """
         return await self.role_repository.create(role_data)
 
     async def get_all_roles(self, enabled: Optional[bool] = None) -> list[Role]:
@@ -31,6 +38,18 @@ class RoleService:
         """
         return await self.role_repository.find_all(enabled=enabled)
 
+    async def get_roles_page(
+        self,
+        first: int,
+        max_results: int,
+        enabled: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> Page[Role]:
+        """Retorna uma página de roles, com filtros opcionais por status e nome."""
+        return await self.role_repository.find_page(
+            first, max_results, enabled=enabled, search=search
+        )
+
     async def get_role_by_id(self, role_id: str) -> Role:
         """Busca um role pelo ID. Lança exceção se não encontrado."""
         role = await self.role_repository.find_by_id(role_id)
@@ -39,8 +58,10 @@ class RoleService:
         return role
 
     async def update_role(self, role_id: str, update_data: dict) -> Role:
-        """Atualiza completamente um role."""
-        await self.get_role_by_id(role_id)
+        """
+        Atualiza completamente um role. A existência não é checada antes: o
+        repositório já lança NotFoundError para um role inexistente.
+        """
         updated_role = await self.role_repository.update(role_id, update_data)
         if not updated_role:
             raise NotFoundError(
@@ -50,7 +71,6 @@ class RoleService:
 
     async def partial_update_role(self, role_id: str, update_data: dict) -> Role:
         """Atualiza parcialmente um role."""
-        await self.get_role_by_id(role_id)
         update_payload = {k: v for k, v in update_data.items() if v is not None}
         if not update_payload:
             return await self.get_role_by_id(
@@ -72,15 +92,41 @@ class RoleService:
         # 1. Garante que o role existe e obtém seus dados
         role_to_delete = await self.get_role_by_id(role_id)
 
-        # 2. Encontra todos os usuários que possuem este role
-        users_with_role = await self.user_repository.find_users_by_role_name(
+        # 2. Encontra todos os usuários que possuem este role. A lista é coletada
+        #    antes das remoções, que deslocariam a paginação do Keycloak.
+        holder_ids: list[str] = []
+        async for users in self.user_repository.iter_users_by_role_name(
             role_to_delete.name
-        )
+        ):
+            holder_ids.extend(user.id for user in users)
+
+        # 3. Remove o role de cada um desses usuários, em paralelo limitado
+        failures = []
+        for start in range(0, len(holder_ids), _CASCADE_CHUNK_SIZE):
+            results = await self.role_repository.remove_roles_from_users(
+                holder_ids[start : start + _CASCADE_CHUNK_SIZE], [role_to_delete]
+            )
+            # Usuário removido nesse meio-tempo (404) não impede a deleção.
+            failures += [r for r in results if not r.succeeded and r.status_code != 404]
+            logger.info(
+                "Deleção do role '%s': %d/%d usuários processados, %d falha(s)",
+                role_to_delete.name,
+                min(start + _CASCADE_CHUNK_SIZE, len(holder_ids)),
+                len(holder_ids),
+                len(failures),
+            )
 
-        # 3. Remove o role de cada um desses usuários
-        for user in users_with_role:
-            await self.role_repository.remove_roles_from_user(
-                user.id, [role_to_delete]
+        if failures:
+            # O role só é desativado quando nenhum usuário o mantém; repetir a
+            # deleção é seguro e processa apenas quem restou.
+            raise KeycloakAPIError(
+                502,
+                f"Não foi possível remover o role '{role_to_delete.name}' de "
+                f"{len(failures)} usuário(s); o role não foi desativado.",
+                error_stack=[
+                    {"user_id": r.user_id, "error_description": r.error_description}
+                    for r in failures
+                ],
             )
 
         # 4. Procede com a deleção lógica do role
@@ -91,20 +137,48 @@ class RoleService:
 
     async def assign_roles_to_user(self, user_id: str, role_ids: list[str]) -> None:
         """Atribui um ou mais roles a um usuário."""
-        roles_to_assign = []
-        for role_id in role_ids:
-            role = await self.get_role_by_id(role_id)
-            roles_to_assign.append(role)
-
+        roles_to_assign = await self._resolve_roles(role_ids)
         if roles_to_assign:
             await self.role_repository.add_roles_to_user(user_id, roles_to_assign)
 
     async def remove_roles_from_user(self, user_id: str, role_ids: list[str]) -> None:
         """Remove um ou mais roles de um usuário."""
-        roles_to_remove = []
-        for role_id in role_ids:
-            role = await self.get_role_by_id(role_id)
-            roles_to_remove.append(role)
-
+        roles_to_remove = await self._resolve_roles(role_ids)
         if roles_to_remove:
-            await self.role_repository.remove_roles_from_user(user_id, roles_to_remove)
\ No newline at end of file
+            await self.role_repository.remove_roles_from_user(user_id, roles_to_remove)
+
+    async def _resolve_roles(self, role_ids: list[str]) -> list[Role]:
+        """
+        Resolve todos os roles de uma vez (cada ID uma única vez). Se algum não
+        existir, nada é alterado e todos os IDs ausentes são informados juntos.
+        """
+        unique_ids = list(dict.fromkeys(role_ids))
+        if not unique_ids:
+            return []
+        roles = await self.role_repository.find_by_ids(unique_ids)
+        found_ids = {role.id for role in roles}
+        missing = [role_id for role_id in unique_ids if role_id not in found_ids]
+        if missing:
+            raise NotFoundError(
+                f"Roles não encontrados: {', '.join(missing)}.",
+                error_stack=[{"role_id": role_id} for role_id in missing],
+            )
+        return roles
+
+    async def assign_roles_to_users(
+        self, user_ids: list[str], role_ids: list[str]
+    ) -> list[RoleAssignmentResult]:
+        """Atribui os mesmos roles a vários usuários, com um resultado por usuário."""
+        roles = await self._resolve_roles(role_ids)
+        return await self.role_repository.add_roles_to_users(
+            list(dict.fromkeys(user_ids)), roles
+        )
+
+    async def remove_roles_from_users(
+        self, user_ids: list[str], role_ids: list[str]
+    ) -> list[RoleAssignmentResult]:
+        """Remove os mesmos roles de vários usuários, com um resultado por usuário."""
+        roles = await self._resolve_roles(role_ids)
+        return await self.role_repository.remove_roles_from_users(
+            list(dict.fromkeys(user_ids)), roles
+        )
@@ -1,7 +1,10 @@
+from collections.abc import AsyncIterator
 from typing import List, Optional
 
+from src.core.domain.bulk import BulkItemResult, BulkOperation
+from src.core.domain.page import Page
 from src.core.domain.role import Role # Importar Role
-from src.core.domain.user import User
+from src.core.domain.user import User, UserFilter
 from src.core.ports.role_repository import IRoleRepository
 from src.core.ports.user_repository import IUserRepository
 
@@ -19,6 +22,15 @@ class UserService:
     async def find_all(self, enabled: Optional[bool] = None) -> List[User]:
         return await self.user_repo.find_all(enabled)
 
+    async def find_page(
+        self, first: int, max_results: int, filters: Optional[UserFilter] = None
+    ) -> Page[User]:
+        return await self.user_repo.find_page(first, max_results, filters)
+
+    def iter_users(self, filters: Optional[UserFilter] = None) -> AsyncIterator[List[User]]:
+        """Percorre o diretório inteiro de usuários, página a página."""
+        return self.user_repo.iter_pages(filters)
+
     async def find_by_id(self, user_id: str) -> Optional[User]:
         return await self.user_repo.find_by_id(user_id)
     
@@ -26,6 +38,9 @@ class UserService:
         await self.find_by_id(user_id)
         return await self.role_repo.find_roles_by_user_id(user_id)
 
+    async def bulk_write(self, operations: List[BulkOperation]) -> List[BulkItemResult]:
+        return await self.user_repo.bulk_write(operations)
+
     async def update_user(self, user_id: str, user_data: dict) -> None:
         await self.user_repo.update(user_id, user_data)
 
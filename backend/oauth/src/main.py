@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from opentelemetry import trace, metrics
@@ -11,6 +13,8 @@ import os
 
 from src.adapters.api.error_handler import api_exception_handler
 from src.adapters.api.routes import auth, roles, users
+from src.adapters.keycloak.client_uuid import client_uuid_resolver
+from src.adapters.keycloak.http_client import close_http_client, start_http_client
 from src.core.exceptions import BaseAPIException
 from src.core.services.role_service import NotFoundError
 
@@ -27,6 +31,16 @@ trace.set_tracer_provider(TracerProvider(resource=resource))
 prometheus_reader = PrometheusMetricReader()
 metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=[prometheus_reader]))
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Abre o pool de conexões com o Keycloak na subida e o fecha no shutdown."""
+    await start_http_client()
+    await client_uuid_resolver.resolve_at_startup()
+    yield
+    await close_http_client()
+
+
 app = FastAPI(
     title="ConstrSW - OAuth API Gateway",
     description="API Gateway para o Keycloak, implementando os requisitos do T1.",
@@ -34,6 +48,7 @@ app = FastAPI(
     docs_url="/api/v1/docs",
     redoc_url="/api/v1/redoc",
     openapi_url="/api/v1/openapi.json",
+    lifespan=lifespan,
 )
 
 origins = [
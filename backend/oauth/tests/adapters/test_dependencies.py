@@ -1,3 +1,4 @@
+import asyncio
 import time
 from unittest.mock import AsyncMock, patch
 
@@ -6,6 +7,7 @@ import pytest
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import rsa
 from jose import jwt
+from jose.jwk import construct as construct_jwk
 from jose.utils import base64url_encode
 from respx import MockRouter
 
@@ -18,6 +20,7 @@ from src.adapters.api.dependencies import (
     get_user_repository,
     get_user_service,
     jwks_cache,
+    verified_token_cache,
 )
 from src.core.exceptions import InvalidTokenError
 
@@ -41,11 +44,14 @@ jwk = {
     "e": base64url_encode(e_bytes).decode("utf-8"),
 }
 mock_jwks = {"keys": [jwk]}
+mock_keys = {"test-kid": construct_jwk(jwk, algorithm="RS256")}
 
 
 @pytest.fixture(autouse=True)
 def clear_cache():
     jwks_cache.clear()
+    verified_token_cache.clear()
+    verified_token_cache.stats.reset()
     yield
 
 
@@ -75,21 +81,21 @@ async def test_get_jwks_fetches_and_caches(respx_mock: MockRouter, mock_settings
         return_value=httpx.Response(200, json=mock_jwks)
     )
     keys = await get_jwks()
-    assert keys == mock_jwks
+    assert list(keys) == ["test-kid"]
     assert jwks_route.call_count == 1
     keys_cached = await get_jwks()
-    assert keys_cached == mock_jwks
+    assert keys_cached is keys
     assert jwks_route.call_count == 1
 
 
 @pytest.mark.asyncio
 async def test_get_jwks_uses_prepopulated_cache(respx_mock: MockRouter, mock_settings):
-    jwks_cache["jwks"] = mock_jwks
+    jwks_cache.store(mock_keys)
     jwks_route = respx_mock.get(mock_settings.keycloak_jwks_url).mock(
         return_value=httpx.Response(500)
     )
     keys = await get_jwks()
-    assert keys == mock_jwks
+    assert keys == mock_keys
     assert jwks_route.call_count == 0
 
 
@@ -104,6 +110,41 @@ async def test_get_jwks_fetch_error_raises_exception(
         await get_jwks()
 
 
+@pytest.mark.asyncio
+async def test_get_jwks_concurrent_cold_calls_share_single_fetch(
+    respx_mock: MockRouter, mock_settings
+):
+    async def slow_jwks(_request):
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json=mock_jwks)
+
+    jwks_route = respx_mock.get(mock_settings.keycloak_jwks_url).mock(
+        side_effect=slow_jwks
+    )
+    results = await asyncio.gather(*(get_jwks() for _ in range(10)))
+    assert all(keys is results[0] for keys in results)
+    assert jwks_route.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_jwks_serves_stale_keys_while_refreshing(
+    respx_mock: MockRouter, mock_settings
+):
+    rotated = {**jwk, "kid": "rotated-kid"}
+    jwks_route = respx_mock.get(mock_settings.keycloak_jwks_url).mock(
+        return_value=httpx.Response(200, json={"keys": [rotated]})
+    )
+    jwks_cache.store(mock_keys)
+    jwks_cache.fetched_at -= mock_settings.JWKS_REFRESH_INTERVAL + 1
+
+    keys = await get_jwks()
+    assert keys == mock_keys  # chaves antigas servidas sem esperar a busca
+
+    await jwks_cache._background_task
+    assert jwks_route.call_count == 1
+    assert list(await get_jwks()) == ["rotated-kid"]
+
+
 # --- Testes para get_current_user ---
 
 
@@ -124,7 +165,7 @@ def create_test_token(payload, headers=None):
 @pytest.mark.asyncio
 @patch("src.adapters.api.dependencies.get_jwks")
 async def test_get_current_user_success(mock_get_jwks: AsyncMock, mock_settings):
-    mock_get_jwks.return_value = mock_jwks
+    mock_get_jwks.return_value = mock_keys
     payload = {"sub": "123"}
     token = create_test_token(payload)
     decoded_payload = await get_current_user(token)
@@ -136,7 +177,7 @@ async def test_get_current_user_success(mock_get_jwks: AsyncMock, mock_settings)
 async def test_get_current_user_invalid_signature_raises_error(
     mock_get_jwks: AsyncMock, mock_settings
 ):
-    mock_get_jwks.return_value = mock_jwks
+    mock_get_jwks.return_value = mock_keys
     token = create_test_token({"sub": "123"}) + "invalid"
     with pytest.raises(InvalidTokenError) as exc_info:
         await get_current_user(token)
@@ -148,7 +189,7 @@ async def test_get_current_user_invalid_signature_raises_error(
 async def test_get_current_user_invalid_algorithm_raises_error(
     mock_get_jwks: AsyncMock, mock_settings
 ):
-    mock_get_jwks.return_value = mock_jwks
+    mock_get_jwks.return_value = mock_keys
     token = create_test_token(
         {"sub": "123"}, headers={"alg": "HS256", "kid": "test-kid"}
     )
@@ -160,23 +201,173 @@ async def test_get_current_user_invalid_algorithm_raises_error(
 @pytest.mark.asyncio
 @patch("src.adapters.api.dependencies.get_jwks")
 async def test_get_current_user_kid_not_found_raises_error(
-    mock_get_jwks: AsyncMock, mock_settings
+    mock_get_jwks: AsyncMock, respx_mock: MockRouter, mock_settings
 ):
     """Testa que um token com 'kid' não encontrado no JWKS levanta InvalidTokenError."""
-    # CORREÇÃO: Fornece um JWKS vazio para garantir que a chave não seja encontrada.
-    mock_get_jwks.return_value = {"keys": []}
+    mock_get_jwks.return_value = mock_keys
+    respx_mock.get(mock_settings.keycloak_jwks_url).mock(
+        return_value=httpx.Response(200, json=mock_jwks)
+    )
     token = create_test_token(
         {"sub": "123"}, headers={"alg": "RS256", "kid": "unknown-kid"}
     )
-    with pytest.raises(InvalidTokenError) as exc_info:
+    with patch("src.adapters.api.dependencies.jwt.decode") as mock_decode:
+        with pytest.raises(InvalidTokenError) as exc_info:
+            await get_current_user(token)
+        # Falha rápida: nenhuma verificação de assinatura é tentada.
+        mock_decode.assert_not_called()
+    assert "unknown-kid" in exc_info.value.description
+
+
+@pytest.mark.asyncio
+async def test_get_jwks_indexes_only_signing_keys(respx_mock: MockRouter, mock_settings):
+    enc_key = {**jwk, "kid": "enc-kid", "use": "enc", "alg": "RSA-OAEP"}
+    respx_mock.get(mock_settings.keycloak_jwks_url).mock(
+        return_value=httpx.Response(200, json={"keys": [jwk, enc_key]})
+    )
+    keys = await get_jwks()
+    assert list(keys) == ["test-kid"]
+
+
+@pytest.mark.asyncio
+async def test_get_jwks_skips_keys_jose_cannot_build(
+    respx_mock: MockRouter, mock_settings
+):
+    okp_key = {
+        "kty": "OKP",
+        "crv": "Ed25519",
+        "kid": "ed-kid",
+        "use": "sig",
+        "alg": "EdDSA",
+        "x": "11qYAYKxCrfVS_7TyWQHOg7hcvPapiMlrwIaaPcHURo",
+    }
+    respx_mock.get(mock_settings.keycloak_jwks_url).mock(
+        return_value=httpx.Response(200, json={"keys": [okp_key, jwk]})
+    )
+    keys = await get_jwks()
+    assert list(keys) == ["test-kid"]
+
+
+@pytest.mark.asyncio
+@patch("src.adapters.api.dependencies.get_jwks")
+async def test_get_current_user_non_string_kid_raises_invalid_token(
+    mock_get_jwks: AsyncMock, mock_settings
+):
+    mock_get_jwks.return_value = mock_keys
+    token = create_test_token({"sub": "123"}, headers={"alg": "RS256", "kid": ["x"]})
+    with pytest.raises(InvalidTokenError):
         await get_current_user(token)
-    # CORREÇÃO: O erro real é a falha na verificação da assinatura, pois nenhuma chave foi encontrada.
-    assert "Signature verification failed" in exc_info.value.description
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_unknown_kid_triggers_rate_limited_refetch(
+    respx_mock: MockRouter, mock_settings
+):
+    rotated = {**jwk, "kid": "rotated-kid"}
+    jwks_route = respx_mock.get(mock_settings.keycloak_jwks_url).mock(
+        return_value=httpx.Response(200, json={"keys": [jwk, rotated]})
+    )
+    jwks_cache.store(mock_keys)
+
+    token = create_test_token(
+        {"sub": "123"}, headers={"alg": "RS256", "kid": "rotated-kid"}
+    )
+    payload = await get_current_user(token)
+    assert payload["sub"] == "123"
+    assert jwks_route.call_count == 1
+
+    # Um segundo 'kid' desconhecido dentro do intervalo mínimo não gera nova busca.
+    bogus = create_test_token({"sub": "123"}, headers={"alg": "RS256", "kid": "bogus"})
+    with pytest.raises(InvalidTokenError):
+        await get_current_user(bogus)
+    assert jwks_route.call_count == 1
+
+
+# --- Testes para o cache de tokens verificados ---
+
+
+@pytest.mark.asyncio
+@patch("src.adapters.api.dependencies.get_jwks")
+async def test_get_current_user_cache_hit_skips_signature_check(
+    mock_get_jwks: AsyncMock, mock_settings
+):
+    mock_get_jwks.return_value = mock_keys
+    token = create_test_token({"sub": "123"})
+
+    first = await get_current_user(token)
+    with patch("src.adapters.api.dependencies.jwt.decode") as mock_decode:
+        second = await get_current_user(token)
+        mock_decode.assert_not_called()
+
+    assert first == second
+    assert second["_token"] == token
+    assert verified_token_cache.stats.hits == 1
+    assert verified_token_cache.stats.misses == 1
+
+
+@pytest.mark.asyncio
+@patch("src.adapters.api.dependencies.get_jwks")
+async def test_get_current_user_cached_token_still_checks_expiry(
+    mock_get_jwks: AsyncMock, mock_settings
+):
+    mock_get_jwks.return_value = mock_keys
+    exp = time.time() + 60
+    token = create_test_token({"sub": "123", "exp": exp})
+    await get_current_user(token)
+
+    # Simula o relógio depois do 'exp': a entrada em cache não pode ser aceita.
+    with patch("src.adapters.api.dependencies.time.time", return_value=exp + 1):
+        with pytest.raises(InvalidTokenError):
+            await get_current_user(token)
+
+
+@pytest.mark.asyncio
+@patch("src.adapters.api.dependencies.get_jwks")
+async def test_get_current_user_invalid_token_is_not_cached(
+    mock_get_jwks: AsyncMock, mock_settings
+):
+    mock_get_jwks.return_value = mock_keys
+    token = create_test_token({"sub": "123"}) + "invalid"
+    for _ in range(2):
+        with pytest.raises(InvalidTokenError):
+            await get_current_user(token)
+    assert len(verified_token_cache) == 0
+    assert verified_token_cache.stats.hits == 0
 
 
 # --- Testes para as Factories de Dependência ---
 
 
+def test_repositories_share_one_client_per_request():
+    """Os repositórios de uma mesma requisição compartilham o client (e suas leituras)."""
+    from typing import Annotated
+
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+
+    from src.adapters.api.dependencies import get_user_token
+
+    app = FastAPI()
+    clients = []
+
+    @app.get("/probe")
+    def probe(
+        user_repo: Annotated[object, Depends(get_user_repository)],
+        role_repo: Annotated[object, Depends(get_role_repository)],
+    ):
+        clients.append((user_repo.client, role_repo.client))
+        return {}
+
+    app.dependency_overrides[get_user_token] = lambda: "user-token"
+    test_client = TestClient(app)
+    test_client.get("/probe")
+    test_client.get("/probe")
+
+    (first_user, first_role), (second_user, _) = clients
+    assert first_user is first_role
+    assert first_user is not second_user
+
+
 def test_dependency_factories_return_instances():
     """Cobre as funções de factory dos repositórios."""
     assert get_user_service() is not None
@@ -1,15 +1,31 @@
 # --- tests/adapters/test_keycloak.py ---
 
-from unittest.mock import AsyncMock
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
 from respx import MockRouter
 
+from src.adapters.keycloak import http_client, retry
+from src.adapters.keycloak.admin_token import admin_token_manager
+from src.adapters.keycloak.client_uuid import client_uuid_resolver
 from src.adapters.keycloak.keycloak_client import KeycloakAdminClient
 from src.adapters.keycloak.keycloak_role_repository import KeycloakRoleRepository
 from src.adapters.keycloak.keycloak_user_repository import KeycloakUserRepository
+from src.adapters.keycloak.read_coalescer import read_coalescer
+from src.adapters.keycloak import resilience
+from src.adapters.keycloak.resilience import (
+    AdaptiveLimiter,
+    CircuitBreaker,
+    UpstreamGuard,
+    endpoint_class,
+    upstream_guards,
+)
+from src.adapters.keycloak.role_catalog import role_catalog
+from src.core.domain.bulk import BulkOperation
 from src.core.domain.role import Role
+from src.core.domain.user import UserFilter
 from src.core.exceptions import (
     ConflictAlreadyExistsError,
     KeycloakAPIError,
@@ -36,9 +52,37 @@ def mock_settings(monkeypatch):
     monkeypatch.setattr(
         "src.adapters.keycloak.keycloak_client.settings", config.settings
     )
+    monkeypatch.setattr("src.adapters.keycloak.admin_token.settings", config.settings)
+    monkeypatch.setattr("src.adapters.keycloak.resilience.settings", config.settings)
     return config.settings
 
 
+@pytest.fixture(autouse=True)
+def reset_admin_token():
+    """O token de admin é compartilhado pelo processo; isola cada teste."""
+    admin_token_manager.invalidate()
+    yield
+    admin_token_manager.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def reset_role_catalog():
+    """O catálogo de roles e o UUID do client são do processo; isola cada teste."""
+    role_catalog.invalidate()
+    client_uuid_resolver.invalidate()
+    yield
+    role_catalog.invalidate()
+    client_uuid_resolver.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def reset_upstream_guards():
+    """Circuit breakers e limites são do processo; isola cada teste."""
+    upstream_guards.reset()
+    yield
+    upstream_guards.reset()
+
+
 @pytest.fixture
 def mock_keycloak_client() -> AsyncMock:
     """Creates a mock of KeycloakAdminClient to inject into repositories."""
@@ -120,6 +164,378 @@ async def test_client_request_non_401_error_raises_api_error(
     assert "Erro na API do Keycloak: Generic Error" in exc_info.value.description
 
 
+@pytest.mark.asyncio
+async def test_http_client_is_shared_between_calls(respx_mock: MockRouter, mock_settings):
+    """Todas as chamadas ao Keycloak reutilizam o mesmo cliente (pool) HTTP."""
+    respx_mock.post(mock_settings.keycloak_token_url).mock(
+        return_value=httpx.Response(200, json={"access_token": "token"})
+    )
+    respx_mock.get(f"{mock_settings.keycloak_admin_api_url}/users").mock(
+        return_value=httpx.Response(200, json=[])
+    )
+    shared = http_client.get_http_client()
+    await KeycloakAdminClient().get("/users")
+    await KeycloakAdminClient().get("/users")
+    assert http_client.get_http_client() is shared
+
+
+@pytest.mark.asyncio
+async def test_http_client_close_releases_pool():
+    """Fechar o cliente compartilhado faz com que um novo seja criado sob demanda."""
+    first = await http_client.start_http_client()
+    await http_client.close_http_client()
+    assert first.is_closed
+    second = http_client.get_http_client()
+    assert second is not first
+    assert not second.is_closed
+
+
+def test_http2_is_opt_in(monkeypatch):
+    monkeypatch.setattr(http_client.settings, "KEYCLOAK_HTTP2", False)
+    monkeypatch.setattr(http_client.importlib.util, "find_spec", lambda name: object())
+    assert not http_client._http2_enabled()
+
+    monkeypatch.setattr(http_client.settings, "KEYCLOAK_HTTP2", True)
+    assert http_client._http2_enabled()
+
+
+def test_http2_falls_back_to_http1_without_h2(monkeypatch, caplog):
+    monkeypatch.setattr(http_client.settings, "KEYCLOAK_HTTP2", True)
+    monkeypatch.setattr(http_client.importlib.util, "find_spec", lambda name: None)
+
+    assert not http_client._http2_enabled()
+    assert "h2" in caplog.text
+    assert not http_client._build_http_client().is_closed
+
+
+# --- Circuit breaker and adaptive limiter ---
+
+
+def test_circuit_breaker_opens_and_probes_after_timeout():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow()  # chamada de teste
+    assert not breaker.allow()  # só uma por vez no meio-aberto
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_circuit_breaker_reopens_when_probe_fails():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=10, clock=lambda: now[0])
+    for _ in range(5):
+        breaker.record_failure()
+    now[0] = 10.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_adaptive_limiter_increases_additively_and_decreases_multiplicatively():
+    limiter = AdaptiveLimiter(
+        initial=2, minimum=1, maximum=3, latency_target=1.0, backoff_ratio=0.5
+    )
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release(0.1)
+    assert limiter.limit == 3
+    limiter.release(0.1)
+    assert limiter.limit == 3  # limite máximo
+
+    assert limiter.try_acquire()
+    limiter.release(5.0)
+    assert limiter.limit == 1.5
+    assert limiter.try_acquire()
+    limiter.release(0.1, overloaded=True)
+    assert limiter.limit == 1  # limite mínimo
+
+
+def test_endpoint_class_classifies_keycloak_urls():
+    # 'src.config' pode ter sido recarregado por outros testes; usa o mesmo
+    # objeto de configurações que o módulo classificador.
+    settings = resilience.settings
+    assert endpoint_class(settings.keycloak_token_url) == "token"
+    assert endpoint_class(f"{settings.keycloak_token_url}/introspect") == "introspect"
+    assert endpoint_class(settings.keycloak_jwks_url) == "certs"
+    assert endpoint_class(f"{settings.keycloak_admin_api_url}/users") == "admin"
+
+
+@pytest.mark.asyncio
+async def test_upstream_guard_fails_fast_when_limit_is_reached():
+    guard = UpstreamGuard("admin")
+    guard.limiter.limit = 1
+    release = asyncio.Event()
+
+    async def slow_send():
+        await release.wait()
+        return httpx.Response(200)
+
+    first = asyncio.ensure_future(guard.call(slow_send))
+    await asyncio.sleep(0)
+    with pytest.raises(KeycloakAPIError) as exc_info:
+        await guard.call(slow_send)
+    assert exc_info.value.status_code == 503
+    release.set()
+    assert (await first).status_code == 200
+    assert guard.limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_calling_keycloak(
+    respx_mock: MockRouter, mock_settings, monkeypatch
+):
+    """Depois de falhas seguidas o circuito abre e o Keycloak não é mais chamado."""
+    monkeypatch.setattr(retry.settings, "KEYCLOAK_RETRY_MAX_ATTEMPTS", 1)
+    respx_mock.post(mock_settings.keycloak_token_url).mock(
+        return_value=httpx.Response(200, json={"access_token": "token"})
+    )
+    users_route = respx_mock.get(f"{mock_settings.keycloak_admin_api_url}/users").mock(
+        return_value=httpx.Response(503, text="down")
+    )
+    client = KeycloakAdminClient()
+    threshold = upstream_guards.get("admin").breaker.failure_threshold
+    for _ in range(threshold):
+        with pytest.raises(KeycloakAPIError):
+            await client.get("/users")
+    assert upstream_guards.get("admin").breaker.state == "open"
+
+    with pytest.raises(KeycloakAPIError) as exc_info:
+        await client.get("/users")
+    assert exc_info.value.status_code == 503
+    assert "circuito aberto" in exc_info.value.description
+    assert users_route.call_count == threshold
+    assert upstream_guards.get("token").breaker.state == "closed"
+
+
+# --- Retries and hedging of idempotent reads ---
+
+
+@pytest.fixture
+def no_backoff_sleep(monkeypatch) -> AsyncMock:
+    """Registra as esperas entre tentativas sem dormir de verdade."""
+    sleep = AsyncMock()
+    monkeypatch.setattr(retry.asyncio, "sleep", sleep)
+    return sleep
+
+
+@pytest.mark.asyncio
+async def test_client_get_retries_transient_failures(
+    respx_mock: MockRouter, mock_settings, no_backoff_sleep: AsyncMock
+):
+    route = respx_mock.get(f"{mock_settings.keycloak_admin_api_url}/users/1").mock(
+        side_effect=[
+            httpx.ConnectError("reset"),
+            httpx.Response(502),
+            httpx.Response(200, json={"id": "1"}),
+        ]
+    )
+    client = KeycloakAdminClient(user_token="user-token")
+
+    assert await client.get("/users/1") == {"id": "1"}
+    assert route.call_count == 3
+    assert no_backoff_sleep.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_client_get_honors_retry_after(
+    respx_mock: MockRouter, mock_settings, no_backoff_sleep: AsyncMock
+):
+    respx_mock.get(f"{mock_settings.keycloak_admin_api_url}/users/1").mock(
+        side_effect=[
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(200, json={"id": "1"}),
+        ]
+    )
+    client = KeycloakAdminClient(user_token="user-token")
+
+    assert await client.get("/users/1") == {"id": "1"}
+    no_backoff_sleep.assert_awaited_once_with(2.0)
+
+
+@pytest.mark.asyncio
+async def test_client_get_stops_when_retry_after_exceeds_budget(
+    respx_mock: MockRouter, mock_settings, no_backoff_sleep: AsyncMock
+):
+    route = respx_mock.get(f"{mock_settings.keycloak_admin_api_url}/users/1").mock(
+        return_value=httpx.Response(503, headers={"Retry-After": "3600"})
+    )
+    client = KeycloakAdminClient(user_token="user-token")
+
+    with pytest.raises(KeycloakAPIError) as exc_info:
+        await client.get("/users/1")
+    assert exc_info.value.status_code == 503
+    assert route.call_count == 1
+    no_backoff_sleep.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_client_reads_share_the_request_retry_budget(
+    respx_mock: MockRouter, mock_settings, no_backoff_sleep: AsyncMock, monkeypatch
+):
+    monkeypatch.setattr(mock_settings, "KEYCLOAK_RETRY_REQUEST_BUDGET", 2)
+    route = respx_mock.get(f"{mock_settings.keycloak_admin_api_url}/users").mock(
+        return_value=httpx.Response(502)
+    )
+    client = KeycloakAdminClient(user_token="user-token")
+
+    for page in range(3):
+        with pytest.raises(KeycloakAPIError):
+            await client.get("/users", params={"first": page})
+
+    # A 1ª leitura gasta o orçamento; as seguintes não são repetidas.
+    assert route.call_count == 5
+    assert no_backoff_sleep.await_count == 2
+    assert client.retry_budget.remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_client_writes_are_not_retried(
+    respx_mock: MockRouter, mock_settings, no_backoff_sleep: AsyncMock
+):
+    route = respx_mock.put(f"{mock_settings.keycloak_admin_api_url}/users/1").mock(
+        return_value=httpx.Response(503)
+    )
+    client = KeycloakAdminClient(user_token="user-token")
+
+    with pytest.raises(KeycloakAPIError):
+        await client.put("/users/1", json={"enabled": False})
+    assert route.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_read_returns_the_faster_response(monkeypatch):
+    monkeypatch.setattr(retry.settings, "KEYCLOAK_HEDGE_ENABLED", True)
+    tracker = retry.latency_trackers["hedge-test"]
+    for _ in range(retry.settings.KEYCLOAK_HEDGE_MIN_SAMPLES):
+        tracker.record(0.01)
+    calls = []
+
+    async def send():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            await asyncio.sleep(10)  # primeira chamada presa
+        return httpx.Response(200, json={"call": len(calls)})
+
+    response = await retry.send_idempotent(send, hedge_key="hedge-test")
+
+    assert response.json() == {"call": 2}
+    assert len(calls) == 2
+    retry.latency_trackers.pop("hedge-test")
+
+
+# --- Process-wide coalescing of concurrent reads ---
+
+
+def _stalled_get(release: asyncio.Event, calls: list):
+    async def fake_get(self, endpoint, params):
+        calls.append((self._user_token, endpoint))
+        await release.wait()
+        return {"endpoint": endpoint}
+
+    return fake_get
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_reads_share_one_call_across_requests(monkeypatch):
+    release, calls = asyncio.Event(), []
+    monkeypatch.setattr(KeycloakAdminClient, "_get", _stalled_get(release, calls))
+    read_coalescer.reset()
+
+    # Um client por requisição, todos com o mesmo token.
+    reads = [
+        asyncio.ensure_future(KeycloakAdminClient(user_token="t").get("/roles"))
+        for _ in range(4)
+    ]
+    other_user = asyncio.ensure_future(KeycloakAdminClient(user_token="u").get("/roles"))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*reads) == [{"endpoint": "/roles"}] * 4
+    await other_user
+    assert calls == [("t", "/roles"), ("u", "/roles")]
+    assert (read_coalescer.reads, read_coalescer.coalesced) == (5, 3)
+
+
+@pytest.mark.asyncio
+async def test_reads_after_a_write_do_not_join_earlier_calls(
+    respx_mock: MockRouter, mock_settings, monkeypatch
+):
+    release, calls = asyncio.Event(), []
+    monkeypatch.setattr(KeycloakAdminClient, "_get", _stalled_get(release, calls))
+    respx_mock.put(f"{mock_settings.keycloak_admin_api_url}/roles/r").mock(
+        return_value=httpx.Response(204)
+    )
+
+    before = asyncio.ensure_future(KeycloakAdminClient(user_token="t").get("/roles"))
+    while not calls:  # a primeira leitura já chegou ao Keycloak
+        await asyncio.sleep(0)
+    await KeycloakAdminClient(user_token="t").put("/roles/r", json={})
+    after = asyncio.ensure_future(KeycloakAdminClient(user_token="t").get("/roles"))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(before, after)
+
+    assert len(calls) == 2
+
+
+# --- Request-scoped read memoization ---
+
+
+@pytest.mark.asyncio
+async def test_client_memoizes_identical_reads(respx_mock: MockRouter, mock_settings):
+    route = respx_mock.get(f"{mock_settings.keycloak_admin_api_url}/users/1").mock(
+        return_value=httpx.Response(200, json={"id": "1"})
+    )
+    client = KeycloakAdminClient(user_token="user-token")
+
+    results = await asyncio.gather(*(client.get("/users/1") for _ in range(5)))
+    await client.get("/users/1")
+
+    assert results == [{"id": "1"}] * 5
+    assert route.call_count == 1
+    assert (client.loader.misses, client.loader.hits) == (1, 5)
+
+
+@pytest.mark.asyncio
+async def test_client_memo_distinguishes_params_and_is_cleared_by_writes(
+    respx_mock: MockRouter, mock_settings
+):
+    base = mock_settings.keycloak_admin_api_url
+    list_route = respx_mock.get(f"{base}/users").mock(
+        return_value=httpx.Response(200, json=[])
+    )
+    respx_mock.put(f"{base}/users/1").mock(return_value=httpx.Response(204))
+    client = KeycloakAdminClient(user_token="user-token")
+
+    await client.get("/users", params={"first": 0})
+    await client.get("/users", params={"first": 10})
+    await client.put("/users/1", json={"enabled": False})
+    await client.get("/users", params={"first": 0})
+
+    assert list_route.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_client_does_not_memoize_failures(respx_mock: MockRouter, mock_settings):
+    route = respx_mock.get(f"{mock_settings.keycloak_admin_api_url}/users/1").mock(
+        side_effect=[httpx.Response(500), httpx.Response(200, json={"id": "1"})]
+    )
+    client = KeycloakAdminClient(user_token="user-token")
+
+    with pytest.raises(KeycloakAPIError):
+        await client.get("/users/1")
+    assert await client.get("/users/1") == {"id": "1"}
+    assert route.call_count == 2
+
+
 # --- Block 2: KeycloakUserRepository Tests ---
 VALID_KC_USER = {
     "id": "123",
@@ -172,18 +588,125 @@ async def test_user_repo_find_by_email_not_found(mock_keycloak_client: AsyncMock
 
 @pytest.mark.asyncio
 async def test_user_repo_find_all_with_filter(mock_keycloak_client: AsyncMock):
-    mock_keycloak_client.get.return_value = [
-        VALID_KC_USER,
-        {**VALID_KC_USER, "id": "2", "enabled": False},
-    ]
+    # O filtro 'enabled' é aplicado pelo Keycloak.
+    mock_keycloak_client.get.return_value = [VALID_KC_USER]
     repo = KeycloakUserRepository(mock_keycloak_client)
 
     users_enabled = await repo.find_all(enabled=True)
     assert len(users_enabled) == 1
-    users_disabled = await repo.find_all(enabled=False)
-    assert len(users_disabled) == 1
-    all_users = await repo.find_all(enabled=None)
-    assert len(all_users) == 2
+    assert mock_keycloak_client.get.await_args.kwargs["params"]["enabled"] == "true"
+    await repo.find_all(enabled=False)
+    assert mock_keycloak_client.get.await_args.kwargs["params"]["enabled"] == "false"
+    await repo.find_all(enabled=None)
+    assert "enabled" not in mock_keycloak_client.get.await_args.kwargs["params"]
+
+
+@pytest.mark.asyncio
+async def test_user_repo_find_page_detects_next_page(mock_keycloak_client: AsyncMock):
+    mock_keycloak_client.get.return_value = [
+        {**VALID_KC_USER, "id": str(i)} for i in range(3)
+    ]
+    repo = KeycloakUserRepository(mock_keycloak_client)
+
+    page = await repo.find_page(first=10, max_results=2)
+
+    assert [user.id for user in page.items] == ["0", "1"]
+    assert page.has_more is True
+    params = mock_keycloak_client.get.await_args.kwargs["params"]
+    assert (params["first"], params["max"]) == (10, 3)
+
+
+@pytest.mark.asyncio
+async def test_user_repo_iter_pages_does_not_memoize_pages(
+    respx_mock: MockRouter, mock_settings, monkeypatch
+):
+    """Páginas lidas no percurso não ficam retidas até o fim da requisição."""
+    monkeypatch.setattr(
+        "src.adapters.keycloak.keycloak_user_repository.settings.PAGE_SIZE_MAX", 2
+    )
+    users = [{**VALID_KC_USER, "id": str(i)} for i in range(5)]
+
+    def page(request):
+        first = int(request.url.params["first"])
+        return httpx.Response(200, json=users[first : first + int(request.url.params["max"])])
+
+    respx_mock.get(f"{mock_settings.keycloak_admin_api_url}/users").mock(side_effect=page)
+    client = KeycloakAdminClient(user_token="user-token")
+
+    pages = [p async for p in KeycloakUserRepository(client).iter_pages()]
+
+    assert sum(len(p) for p in pages) == 5
+    assert client.loader._results == {}
+
+
+@pytest.mark.asyncio
+async def test_user_repo_iter_pages_prefetches_next_page(
+    mock_keycloak_client: AsyncMock, monkeypatch
+):
+    monkeypatch.setattr(
+        "src.adapters.keycloak.keycloak_user_repository.settings.PAGE_SIZE_MAX", 2
+    )
+    users = [{**VALID_KC_USER, "id": str(i)} for i in range(3)]
+    requested = []
+
+    async def get(endpoint, params=None, memoize=True):
+        requested.append(params["first"])
+        return users[params["first"] : params["first"] + params["max"]]
+
+    mock_keycloak_client.get.side_effect = get
+    pages = KeycloakUserRepository(mock_keycloak_client).iter_pages()
+
+    first_page = await anext(pages)
+    await asyncio.sleep(0)
+    # A segunda página já foi pedida antes de o consumidor solicitá-la.
+    assert requested == [0, 2]
+    assert [user.id for user in first_page] == ["0", "1"]
+    assert [[user.id for user in page] async for page in pages] == [["2"]]
+
+
+@pytest.mark.asyncio
+async def test_user_repo_find_page_pushes_filters_to_keycloak(
+    mock_keycloak_client: AsyncMock,
+):
+    mock_keycloak_client.get.return_value = []
+    repo = KeycloakUserRepository(mock_keycloak_client)
+
+    await repo.find_page(
+        0,
+        10,
+        UserFilter(enabled=True, search="ana", first_name="Ana", email="a@b.c", exact=True),
+    )
+
+    params = mock_keycloak_client.get.await_args.kwargs["params"]
+    assert params == {
+        "first": 0,
+        "max": 11,
+        "briefRepresentation": "true",
+        "enabled": "true",
+        "search": "ana",
+        "firstName": "Ana",
+        "email": "a@b.c",
+        "exact": "true",
+    }
+
+
+@pytest.mark.asyncio
+async def test_user_repo_find_all_walks_every_page(
+    mock_keycloak_client: AsyncMock, monkeypatch
+):
+    monkeypatch.setattr(
+        "src.adapters.keycloak.keycloak_user_repository.settings.PAGE_SIZE_MAX", 2
+    )
+    users = [{**VALID_KC_USER, "id": str(i)} for i in range(5)]
+
+    async def get(endpoint, params=None, memoize=True):
+        return users[params["first"] : params["first"] + params["max"]]
+
+    mock_keycloak_client.get.side_effect = get
+    all_users = await KeycloakUserRepository(mock_keycloak_client).find_all()
+
+    assert [user.id for user in all_users] == ["0", "1", "2", "3", "4"]
+    assert mock_keycloak_client.get.await_count == 3
 
 
 @pytest.mark.asyncio
@@ -197,6 +720,178 @@ async def test_user_repo_create_success(mock_keycloak_client: AsyncMock):
     assert new_user.id == "new-user-id"
 
 
+def _create_op(username: str) -> BulkOperation:
+    return BulkOperation(action="create", data={**MINIMAL_USER_PAYLOAD, "username": username})
+
+
+@pytest.mark.asyncio
+async def test_user_repo_bulk_write_uses_partial_import(mock_keycloak_client: AsyncMock):
+    import_response = MagicMock(spec=httpx.Response)
+    import_response.json.return_value = {
+        "results": [
+            {"action": "ADDED", "resourceType": "USER", "resourceName": "a@a.com", "id": "id-a"},
+            {"action": "SKIPPED", "resourceType": "USER", "resourceName": "b@a.com", "id": "id-b"},
+        ]
+    }
+    mock_keycloak_client.post.return_value = import_response
+    mock_keycloak_client.put.side_effect = [None, KeycloakAPIError(404, "not found")]
+    operations = [
+        _create_op("A@a.com"),
+        BulkOperation(action="update", user_id="u1", data={"first_name": "Novo"}),
+        _create_op("b@a.com"),
+        _create_op("a@a.com"),
+        BulkOperation(action="disable", user_id="missing"),
+    ]
+
+    results = await KeycloakUserRepository(mock_keycloak_client).bulk_write(operations)
+
+    assert [(r.index, r.status_code) for r in results] == [
+        (0, 201), (1, 200), (2, 409), (3, 409), (4, 404)
+    ]
+    assert results[0].user_id == "id-a"
+    mock_keycloak_client.post.assert_awaited_once()
+    assert mock_keycloak_client.post.await_args.args[0] == "/partialImport"
+    body = mock_keycloak_client.post.await_args.kwargs["json"]
+    assert body["ifResourceExists"] == "SKIP"
+    assert [user["username"] for user in body["users"]] == ["A@a.com", "b@a.com"]
+    mock_keycloak_client.put.assert_any_await("/users/u1", json={"firstName": "Novo"})
+
+
+@pytest.mark.asyncio
+async def test_user_repo_bulk_write_falls_back_to_individual_creates(
+    mock_keycloak_client: AsyncMock,
+):
+    created = MagicMock(spec=httpx.Response)
+    created.headers = {"location": "http://kc/users/new-id"}
+
+    async def post(endpoint, json=None):
+        if endpoint == "/partialImport":
+            raise KeycloakAPIError(403, "forbidden")
+        if json["username"] == "dup@a.com":
+            raise KeycloakAPIError(409, "exists")
+        return created
+
+    mock_keycloak_client.post.side_effect = post
+    results = await KeycloakUserRepository(mock_keycloak_client).bulk_write(
+        [_create_op("ok@a.com"), _create_op("dup@a.com")]
+    )
+
+    assert [(r.status_code, r.user_id) for r in results] == [(201, "new-id"), (409, None)]
+    assert results[1].error_code == "OA-409"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error", [KeycloakAPIError(500, "boom"), httpx.ReadTimeout("timeout")]
+)
+async def test_user_repo_bulk_write_does_not_repost_when_import_outcome_unknown(
+    mock_keycloak_client: AsyncMock, error: Exception
+):
+    mock_keycloak_client.post.side_effect = error
+    results = await KeycloakUserRepository(mock_keycloak_client).bulk_write(
+        [_create_op("a@a.com"), _create_op("b@a.com")]
+    )
+
+    assert [r.status_code for r in results] == [502, 502]
+    mock_keycloak_client.post.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_user_repo_bulk_write_empty_update_checks_user_exists(
+    mock_keycloak_client: AsyncMock,
+):
+    async def get(endpoint, params=None, memoize=True):
+        if endpoint == "/users/missing":
+            raise KeycloakAPIError(404, "not found")
+        return VALID_KC_USER
+
+    mock_keycloak_client.get.side_effect = get
+    results = await KeycloakUserRepository(mock_keycloak_client).bulk_write(
+        [
+            BulkOperation(action="update", user_id="u1", data={}),
+            BulkOperation(action="update", user_id="missing", data={}),
+        ]
+    )
+
+    assert [r.status_code for r in results] == [200, 404]
+    assert results[1].error_description == "Usuário com ID 'missing' não encontrado."
+    mock_keycloak_client.put.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_user_repo_bulk_write_bounds_concurrency(
+    mock_keycloak_client: AsyncMock, monkeypatch
+):
+    monkeypatch.setattr(
+        "src.adapters.keycloak.keycloak_user_repository.settings.BULK_MAX_CONCURRENCY", 3
+    )
+    running = 0
+    peak = 0
+
+    async def put(endpoint, json=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    mock_keycloak_client.put.side_effect = put
+    operations = [BulkOperation(action="disable", user_id=str(i)) for i in range(10)]
+    results = await KeycloakUserRepository(mock_keycloak_client).bulk_write(operations)
+
+    assert all(result.succeeded for result in results)
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_user_repo_create_builds_user_without_read_back(
+    mock_keycloak_client: AsyncMock,
+):
+    mock_response = MagicMock(spec=httpx.Response)
+    mock_response.headers = {"location": "http://kc/admin/realms/r/users/new-user-id"}
+    mock_keycloak_client.post.return_value = mock_response
+    repo = KeycloakUserRepository(mock_keycloak_client)
+
+    new_user = await repo.create({**MINIMAL_USER_PAYLOAD, "username": "New@A.com"})
+
+    assert new_user.model_dump() == {
+        "id": "new-user-id",
+        "username": "new@a.com",
+        "first_name": "f",
+        "last_name": "l",
+        "enabled": True,
+    }
+    mock_keycloak_client.get.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_user_repo_create_strict_mode_reads_back(
+    mock_keycloak_client: AsyncMock, monkeypatch
+):
+    monkeypatch.setattr(
+        "src.adapters.keycloak.keycloak_user_repository.settings.KEYCLOAK_CREATE_READ_BACK",
+        True,
+    )
+    mock_response = MagicMock(spec=httpx.Response)
+    mock_response.headers = {"location": "http://kc/admin/realms/r/users/123"}
+    mock_keycloak_client.post.return_value = mock_response
+    mock_keycloak_client.get.return_value = VALID_KC_USER
+
+    new_user = await KeycloakUserRepository(mock_keycloak_client).create(MINIMAL_USER_PAYLOAD)
+
+    assert new_user.username == "test@example.com"
+    mock_keycloak_client.get.assert_awaited_once_with("/users/123")
+
+
+@pytest.mark.asyncio
+async def test_role_repo_create_conflict_on_write(mock_keycloak_client: AsyncMock):
+    mock_keycloak_client.get_with_admin.return_value = [{"id": "client-uuid"}]
+    mock_keycloak_client.post.side_effect = KeycloakAPIError(409, "Conflict")
+
+    with pytest.raises(ConflictAlreadyExistsError, match="admin"):
+        await KeycloakRoleRepository(mock_keycloak_client).create({"name": "admin"})
+
+
 @pytest.mark.asyncio
 async def test_user_repo_create_conflict_raises_error(mock_keycloak_client: AsyncMock):
     mock_keycloak_client.post.side_effect = KeycloakAPIError(409, "")
@@ -249,6 +944,45 @@ async def test_user_repo_disable(mock_keycloak_client: AsyncMock):
     mock_keycloak_client.put.assert_awaited_with("/users/123", json={"enabled": False})
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "write",
+    [
+        lambda repo: repo.update("missing", {"first_name": "X"}),
+        lambda repo: repo.reset_password("missing", "new-pass"),
+        lambda repo: repo.disable("missing"),
+    ],
+)
+async def test_user_repo_optimistic_writes_skip_pre_read(
+    mock_keycloak_client: AsyncMock, write
+):
+    mock_keycloak_client.put.side_effect = KeycloakAPIError(404, "User not found")
+    repo = KeycloakUserRepository(mock_keycloak_client)
+
+    with pytest.raises(NotFoundError):
+        await write(repo)
+
+    mock_keycloak_client.get.assert_not_awaited()
+    mock_keycloak_client.put.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_user_repo_strict_writes_check_existence_first(
+    mock_keycloak_client: AsyncMock, monkeypatch
+):
+    monkeypatch.setattr(
+        "src.adapters.keycloak.keycloak_user_repository.settings.KEYCLOAK_OPTIMISTIC_WRITES",
+        False,
+    )
+    mock_keycloak_client.get.side_effect = KeycloakAPIError(404, "User not found")
+    repo = KeycloakUserRepository(mock_keycloak_client)
+
+    with pytest.raises(NotFoundError):
+        await repo.disable("missing")
+
+    mock_keycloak_client.put.assert_not_awaited()
+
+
 # --- Block 3: KeycloakRoleRepository Tests ---
 VALID_KC_ROLE = {"id": "role-1", "name": "admin", "description": "desc"}
 
@@ -324,6 +1058,394 @@ async def test_role_repo_remove_roles_from_user(mock_keycloak_client: AsyncMock)
     mock_keycloak_client.delete.assert_awaited_once()
 
 
+# --- Role catalog ---
+CATALOG_KC_ROLES = [
+    {"id": "role-1", "name": "admin", "attributes": {"enabled": ["true"]}},
+    {"id": "role-2", "name": "viewer", "attributes": {"enabled": ["false"]}},
+]
+
+
+def _catalog_client(mock_keycloak_client: AsyncMock) -> AsyncMock:
+    async def get_with_admin(path, params=None):
+        if path == "/clients":
+            return [{"id": "client-uuid"}]
+        if path == "/clients/client-uuid/roles":
+            return CATALOG_KC_ROLES
+        raise KeycloakAPIError(404, "not found")
+
+    mock_keycloak_client.get_with_admin.side_effect = get_with_admin
+    return mock_keycloak_client
+
+
+def _role_list_calls(mock_keycloak_client: AsyncMock) -> int:
+    return sum(
+        1
+        for call in mock_keycloak_client.get_with_admin.await_args_list
+        if call.args[0] == "/clients/client-uuid/roles"
+    )
+
+
+@pytest.mark.asyncio
+async def test_role_catalog_is_loaded_once_and_shared(mock_keycloak_client: AsyncMock):
+    client = _catalog_client(mock_keycloak_client)
+
+    # Cada requisição cria um repositório novo; o catálogo é do processo.
+    assert (await KeycloakRoleRepository(client).find_by_id("role-2")).name == "viewer"
+    assert (await KeycloakRoleRepository(client).find_by_name("admin")).id == "role-1"
+    enabled = await KeycloakRoleRepository(client).find_all(enabled=True)
+
+    assert [role.id for role in enabled] == ["role-1"]
+    assert _role_list_calls(client) == 1
+
+
+@pytest.mark.asyncio
+async def test_role_repo_find_page_slices_catalog_by_name(mock_keycloak_client: AsyncMock):
+    client = _catalog_client(mock_keycloak_client)
+    repo = KeycloakRoleRepository(client)
+
+    page = await repo.find_page(first=1, max_results=1)
+
+    assert [role.name for role in page.items] == ["viewer"]
+    assert (page.has_more, page.total) == (False, 2)
+
+
+@pytest.mark.asyncio
+async def test_role_repo_find_page_search(mock_keycloak_client: AsyncMock):
+    client = _catalog_client(mock_keycloak_client)
+
+    page = await KeycloakRoleRepository(client).find_page(0, 10, search="VIEW")
+
+    assert [role.name for role in page.items] == ["viewer"]
+    assert page.total == 1
+
+
+@pytest.mark.asyncio
+async def test_role_catalog_concurrent_cold_load_fetches_once(
+    mock_keycloak_client: AsyncMock,
+):
+    client = _catalog_client(mock_keycloak_client)
+
+    await asyncio.gather(
+        *(KeycloakRoleRepository(client).find_by_id("role-1") for _ in range(10))
+    )
+
+    assert _role_list_calls(client) == 1
+
+
+@pytest.mark.asyncio
+async def test_role_catalog_miss_falls_back_to_roles_by_id(
+    mock_keycloak_client: AsyncMock,
+):
+    client = _catalog_client(mock_keycloak_client)
+    repo = KeycloakRoleRepository(client)
+    await repo.find_all()
+
+    client.get_with_admin.side_effect = None
+    client.get_with_admin.return_value = {
+        "id": "role-3",
+        "name": "editor",
+        "clientRole": True,
+        "containerId": "client-uuid",
+    }
+    role = await repo.find_by_id("role-3")
+
+    assert role.name == "editor"
+    assert role_catalog.get_by_name("editor") == role
+    client.get_with_admin.assert_awaited_with("/roles-by-id/role-3")
+
+
+@pytest.mark.asyncio
+async def test_role_repo_find_by_ids_single_pass(mock_keycloak_client: AsyncMock):
+    client = _catalog_client(mock_keycloak_client)
+
+    roles = await KeycloakRoleRepository(client).find_by_ids(["role-2", "missing", "role-1"])
+
+    assert [role.id for role in roles] == ["role-2", "role-1"]
+    assert _role_list_calls(client) == 1
+    client.get_with_admin.assert_any_await("/roles-by-id/missing")
+
+
+@pytest.mark.asyncio
+async def test_role_catalog_ignores_roles_of_other_containers(
+    mock_keycloak_client: AsyncMock,
+):
+    client = _catalog_client(mock_keycloak_client)
+    repo = KeycloakRoleRepository(client)
+    await repo.find_all()
+
+    client.get_with_admin.side_effect = None
+    client.get_with_admin.return_value = {
+        "id": "realm-role",
+        "name": "offline_access",
+        "clientRole": False,
+        "containerId": "test-realm",
+    }
+
+    assert await repo.find_by_id("realm-role") is None
+
+
+@pytest.mark.asyncio
+async def test_role_catalog_is_updated_by_writes(mock_keycloak_client: AsyncMock):
+    client = _catalog_client(mock_keycloak_client)
+    repo = KeycloakRoleRepository(client)
+
+    await repo.update("role-1", {"name": "superadmin"})
+
+    assert role_catalog.get_by_name("admin") is None
+    assert (await repo.find_by_name("superadmin")).id == "role-1"
+
+    await repo.delete("role-1")
+    assert (await repo.find_by_id("role-1")).enabled is False
+    assert _role_list_calls(client) == 1
+
+
+@pytest.mark.asyncio
+async def test_role_catalog_keeps_writes_made_during_reload():
+    release = asyncio.Event()
+
+    async def slow_loader():
+        await release.wait()
+        return [Role(id="role-1", name="admin", enabled=True)]
+
+    reload = asyncio.ensure_future(role_catalog.reload(slow_loader))
+    await asyncio.sleep(0)
+    role_catalog.upsert(Role(id="role-1", name="admin", enabled=False))
+    release.set()
+    await reload
+
+    assert role_catalog.get_by_id("role-1").enabled is False
+
+
+@pytest.mark.asyncio
+async def test_role_catalog_drops_writes_queued_during_failed_reload():
+    release = asyncio.Event()
+
+    async def failing_loader():
+        await release.wait()
+        raise KeycloakAPIError(503, "down")
+
+    reload = asyncio.ensure_future(role_catalog.reload(failing_loader))
+    await asyncio.sleep(0)
+    role_catalog.upsert(Role(id="role-1", name="admin", enabled=False))
+    release.set()
+    with pytest.raises(KeycloakAPIError):
+        await reload
+    # A escrita vale para o catálogo atual, mas não sobre uma carga posterior.
+    assert role_catalog.get_by_id("role-1").enabled is False
+
+    async def fresh_loader():
+        return [Role(id="role-1", name="admin", enabled=True)]
+
+    await role_catalog.reload(fresh_loader)
+    assert role_catalog.get_by_id("role-1").enabled is True
+
+
+@pytest.mark.asyncio
+async def test_role_catalog_refreshes_in_background_when_stale(
+    mock_keycloak_client: AsyncMock, monkeypatch
+):
+    client = _catalog_client(mock_keycloak_client)
+    repo = KeycloakRoleRepository(client)
+    await repo.find_all()
+
+    monkeypatch.setattr(
+        "src.adapters.keycloak.role_catalog.settings.ROLE_CATALOG_REFRESH_INTERVAL", 0
+    )
+    roles = await repo.find_all()
+    await role_catalog._background_task
+
+    assert len(roles) == 2
+    assert _role_list_calls(client) == 2
+
+
+@pytest.mark.asyncio
+async def test_find_roles_by_user_id_joins_mappings_with_catalog(
+    mock_keycloak_client: AsyncMock,
+):
+    client = _catalog_client(mock_keycloak_client)
+    catalog_get = client.get_with_admin.side_effect
+
+    async def get_with_admin(path, params=None):
+        if path == "/users/user-1/role-mappings/clients/client-uuid":
+            return [{"id": "role-1", "name": "admin"}, {"id": "role-2", "name": "viewer"}]
+        return await catalog_get(path, params)
+
+    client.get_with_admin.side_effect = get_with_admin
+    roles = await KeycloakRoleRepository(client).find_roles_by_user_id("user-1")
+
+    # Apenas role-1 está habilitado; nenhuma busca por role individual.
+    assert [role.id for role in roles] == ["role-1"]
+    paths = [call.args[0] for call in client.get_with_admin.await_args_list]
+    assert not any(path.startswith(("/roles-by-id", "/clients/client-uuid/roles/")) for path in paths)
+
+
+@pytest.mark.asyncio
+async def test_find_roles_by_user_id_bounds_lookups_of_unknown_roles(
+    mock_keycloak_client: AsyncMock, monkeypatch
+):
+    monkeypatch.setattr("src.adapters.keycloak.concurrency.settings.KEYCLOAK_MAX_FANOUT", 2)
+    client = _catalog_client(mock_keycloak_client)
+    catalog_get = client.get_with_admin.side_effect
+    unknown = [{"id": f"new-{i}", "name": f"new-{i}"} for i in range(6)]
+    running = 0
+    peak = 0
+
+    async def get_with_admin(path, params=None):
+        nonlocal running, peak
+        if path == "/users/user-1/role-mappings/clients/client-uuid":
+            return unknown
+        if path.startswith("/roles-by-id/"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            role_id = path.rsplit("/", 1)[1]
+            return {
+                "id": role_id,
+                "name": role_id,
+                "clientRole": True,
+                "containerId": "client-uuid",
+            }
+        return await catalog_get(path, params)
+
+    client.get_with_admin.side_effect = get_with_admin
+    roles = await KeycloakRoleRepository(client).find_roles_by_user_id("user-1")
+
+    assert [role.id for role in roles] == [m["id"] for m in unknown]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_find_roles_by_user_id_user_not_found(mock_keycloak_client: AsyncMock):
+    mock_keycloak_client.get_with_admin.side_effect = [
+        [{"id": "client-uuid"}],
+        KeycloakAPIError(404, "User not found"),
+    ]
+    with pytest.raises(NotFoundError):
+        await KeycloakRoleRepository(mock_keycloak_client).find_roles_by_user_id("nope")
+
+
+@pytest.mark.asyncio
+async def test_role_repo_add_roles_to_users_reports_per_user(
+    mock_keycloak_client: AsyncMock, monkeypatch
+):
+    monkeypatch.setattr(
+        "src.adapters.keycloak.keycloak_role_repository.settings.BULK_MAX_CONCURRENCY", 2
+    )
+    mock_keycloak_client.get_with_admin.return_value = [{"id": "client-uuid"}]
+    running = 0
+    peak = 0
+
+    async def post(endpoint, json=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if endpoint.startswith("/users/missing/"):
+            raise KeycloakAPIError(404, "User not found")
+
+    mock_keycloak_client.post.side_effect = post
+    roles = [Role(id="r1", name="n1", enabled=True)]
+    results = await KeycloakRoleRepository(mock_keycloak_client).add_roles_to_users(
+        ["u1", "missing", "u2", "u3"], roles
+    )
+
+    assert [(r.user_id, r.status_code) for r in results] == [
+        ("u1", 204), ("missing", 404), ("u2", 204), ("u3", 204)
+    ]
+    assert peak == 2
+    mock_keycloak_client.post.assert_any_await(
+        "/users/u1/role-mappings/clients/client-uuid", json=[{"id": "r1", "name": "n1"}]
+    )
+
+
+# --- Client UUID ---
+
+
+def _client_lookups(mock_keycloak_client: AsyncMock) -> int:
+    return sum(
+        1
+        for call in mock_keycloak_client.get_with_admin.await_args_list
+        if call.args[0] == "/clients"
+    )
+
+
+@pytest.mark.asyncio
+async def test_client_uuid_is_resolved_once_per_process(mock_keycloak_client: AsyncMock):
+    mock_keycloak_client.get_with_admin.return_value = [{"id": "client-uuid"}]
+
+    await asyncio.gather(
+        *(KeycloakRoleRepository(mock_keycloak_client)._get_client_uuid() for _ in range(5))
+    )
+    mock_keycloak_client.get.return_value = []
+    await KeycloakUserRepository(mock_keycloak_client).find_users_by_role_name("admin")
+
+    assert _client_lookups(mock_keycloak_client) == 1
+    mock_keycloak_client.get.assert_awaited_once()
+    assert mock_keycloak_client.get.await_args.args[0] == "/clients/client-uuid/roles/admin/users"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "message", ['{"error":"Could not find client"}', '{"error":"Client not found"}']
+)
+async def test_client_uuid_is_re_resolved_when_client_is_missing(
+    mock_keycloak_client: AsyncMock, message: str
+):
+    mock_keycloak_client.get_with_admin.side_effect = [
+        [{"id": "old-uuid"}],
+        [{"id": "new-uuid"}],
+    ]
+    mock_keycloak_client.get.side_effect = [
+        KeycloakAPIError(404, f"Erro na API do Keycloak: {message}"),
+        [],
+    ]
+    await client_uuid_resolver.get(mock_keycloak_client)
+
+    users = await KeycloakUserRepository(mock_keycloak_client).find_users_by_role_name("admin")
+
+    assert users == []
+    assert await client_uuid_resolver.get(mock_keycloak_client) == "new-uuid"
+    assert mock_keycloak_client.get.await_args.args[0] == "/clients/new-uuid/roles/admin/users"
+
+
+@pytest.mark.asyncio
+async def test_user_repo_find_users_by_role_name_walks_every_page(
+    mock_keycloak_client: AsyncMock, monkeypatch
+):
+    monkeypatch.setattr(
+        "src.adapters.keycloak.keycloak_user_repository.settings.PAGE_SIZE_MAX", 2
+    )
+    mock_keycloak_client.get_with_admin.return_value = [{"id": "client-uuid"}]
+    holders = [{**VALID_KC_USER, "id": str(i)} for i in range(4)]
+
+    async def get(endpoint, params=None, memoize=True):
+        return holders[params["first"] : params["first"] + params["max"]]
+
+    mock_keycloak_client.get.side_effect = get
+    users = await KeycloakUserRepository(mock_keycloak_client).find_users_by_role_name("admin")
+
+    assert [user.id for user in users] == ["0", "1", "2", "3"]
+    # A última página cheia exige uma chamada extra para confirmar o fim.
+    assert mock_keycloak_client.get.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_client_uuid_is_kept_on_other_not_found_errors(
+    mock_keycloak_client: AsyncMock,
+):
+    mock_keycloak_client.get_with_admin.return_value = [{"id": "client-uuid"}]
+    mock_keycloak_client.get.side_effect = KeycloakAPIError(
+        404, 'Erro na API do Keycloak: {"error":"Could not find role"}'
+    )
+
+    users = await KeycloakUserRepository(mock_keycloak_client).find_users_by_role_name("x")
+
+    assert users == []
+    assert _client_lookups(mock_keycloak_client) == 1
+
+
 # --- Block of Additional Tests for 100% Coverage ---
 
 
@@ -332,14 +1454,79 @@ async def test_client_get_admin_token_returns_cached_token(mock_settings):
     """
     Tests that the admin token is returned from cache if it already exists.
     """
-    client = KeycloakAdminClient()
-    client._admin_token = "cached-admin-token"  # Pre-populate the token
+    admin_token_manager._token = "cached-admin-token"  # Pre-populate the token
+    admin_token_manager._refresh_at = float("inf")
 
-    token = await client._get_admin_token()
+    token = await KeycloakAdminClient()._get_admin_token()
 
     assert token == "cached-admin-token"
 
 
+@pytest.mark.asyncio
+async def test_admin_token_is_shared_between_client_instances(
+    respx_mock: MockRouter, mock_settings
+):
+    route = respx_mock.post(mock_settings.keycloak_token_url).mock(
+        return_value=httpx.Response(
+            200, json={"access_token": "admin-token", "expires_in": 300}
+        )
+    )
+    assert await KeycloakAdminClient()._get_admin_token() == "admin-token"
+    assert await KeycloakAdminClient()._get_admin_token() == "admin-token"
+    assert route.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_admin_token_refreshed_before_expiry(
+    respx_mock: MockRouter, mock_settings
+):
+    route = respx_mock.post(mock_settings.keycloak_token_url).mock(
+        side_effect=[
+            httpx.Response(200, json={"access_token": "first", "expires_in": 300}),
+            httpx.Response(200, json={"access_token": "second", "expires_in": 300}),
+        ]
+    )
+    with patch("src.adapters.keycloak.admin_token.time.monotonic", return_value=1000.0):
+        assert await admin_token_manager.get_token() == "first"
+    # Dentro da margem de renovação (30s antes de expirar) o token é renovado.
+    with patch("src.adapters.keycloak.admin_token.time.monotonic", return_value=1275.0):
+        assert await admin_token_manager.get_token() == "second"
+    assert route.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_admin_token_concurrent_callers_share_single_refresh(
+    respx_mock: MockRouter, mock_settings
+):
+    async def slow_token(_request):
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"access_token": "admin-token"})
+
+    route = respx_mock.post(mock_settings.keycloak_token_url).mock(
+        side_effect=slow_token
+    )
+    tokens = await asyncio.gather(*(admin_token_manager.get_token() for _ in range(10)))
+    assert set(tokens) == {"admin-token"}
+    assert route.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_client_get_with_admin_refreshes_token_on_401(
+    respx_mock: MockRouter, mock_settings
+):
+    token_route = respx_mock.post(mock_settings.keycloak_token_url).mock(
+        side_effect=[
+            httpx.Response(200, json={"access_token": "revoked-token"}),
+            httpx.Response(200, json={"access_token": "new-token"}),
+        ]
+    )
+    respx_mock.get(f"{mock_settings.keycloak_admin_api_url}/clients").mock(
+        side_effect=[httpx.Response(401), httpx.Response(200, json=[{"id": "c"}])]
+    )
+    assert await KeycloakAdminClient().get_with_admin("/clients") == [{"id": "c"}]
+    assert token_route.call_count == 2
+
+
 @pytest.mark.asyncio
 async def test_client_request_token_refresh_fails_raises_error(
     respx_mock: MockRouter, mock_settings
@@ -1,15 +1,27 @@
-from unittest.mock import MagicMock
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
 from fastapi.testclient import TestClient
 from respx import MockRouter
 
+from src.adapters.api.fast_json import ListSerializer
+from src.adapters.api.schemas.role_schemas import RoleResponse
+from src.adapters.api.schemas.user_schemas import UserResponse
+from src.core.domain.bulk import BulkItemResult, BulkOperation, RoleAssignmentResult
+from src.core.domain.page import Page
 from src.core.domain.role import Role
 
 # Importa os objetos de domínio para usar como retornos mockados
-from src.core.domain.user import User
-from src.core.exceptions import ConflictAlreadyExistsError, NotFoundError
+from src.core.domain.user import User, UserFilter
+from src.core.exceptions import (
+    ConflictAlreadyExistsError,
+    InvalidTokenError,
+    KeycloakAPIError,
+    NotFoundError,
+)
 
 # Fixtures do conftest.py (client, mock_user_service, mock_role_service) são injetadas automaticamente
 
@@ -21,7 +33,7 @@ VALID_USER = User(
     last_name="User",
     enabled=True,
 )
-VALID_ROLE = Role(id="role-123", name="admin", description="Admin Role")
+VALID_ROLE = Role(id="role-123", name="admin", description="Admin Role", enabled=True)
 
 # --- Testes de Autenticação (/login) ---
 
@@ -90,6 +102,149 @@ async def test_login_keycloak_server_error(
         client.post("/login", data={"username": "user", "password": "pw"})
 
 
+# --- Testes de Validação (/validate) ---
+
+VALID_CLAIMS = {
+    "sub": "user-123",
+    "preferred_username": "test@example.com",
+    "azp": "test-client",
+    "exp": int(time.time()) + 3600,
+    "iat": int(time.time()),
+    "realm_access": {"roles": ["admin"]},
+}
+AUTH_HEADER = {"Authorization": "Bearer some-token"}
+
+
+def test_validate_local_mode_skips_introspection(
+    client: TestClient, respx_mock: MockRouter, mock_auth_settings, monkeypatch
+):
+    monkeypatch.setattr(mock_auth_settings, "TOKEN_VALIDATION_MODE", "local")
+    introspect_route = respx_mock.post(
+        f"{mock_auth_settings.keycloak_token_url}/introspect"
+    )
+    with patch(
+        "src.adapters.api.routes.auth.verify_token",
+        AsyncMock(return_value=dict(VALID_CLAIMS)),
+    ):
+        response = client.post("/api/v1/validate", headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["active"] is True
+    assert body["username"] == "test@example.com"
+    assert body["client_id"] == "test-client"
+    assert body["realm_access"]["roles"] == ["admin"]
+    assert introspect_route.call_count == 0
+
+
+def test_validate_local_mode_invalid_token_returns_401(
+    client: TestClient, mock_auth_settings, monkeypatch
+):
+    monkeypatch.setattr(mock_auth_settings, "TOKEN_VALIDATION_MODE", "local")
+    with patch(
+        "src.adapters.api.routes.auth.verify_token",
+        AsyncMock(side_effect=InvalidTokenError()),
+    ):
+        response = client.post("/api/v1/validate", headers=AUTH_HEADER)
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize(
+    ("exp_offset", "query", "expected_calls"),
+    [(3600, "", 0), (10, "", 1), (3600, "?introspect=true", 1)],
+)
+def test_validate_hybrid_mode_introspects_only_when_needed(
+    client: TestClient,
+    respx_mock: MockRouter,
+    mock_auth_settings,
+    monkeypatch,
+    exp_offset,
+    query,
+    expected_calls,
+):
+    monkeypatch.setattr(mock_auth_settings, "TOKEN_VALIDATION_MODE", "hybrid")
+    introspect_route = respx_mock.post(
+        f"{mock_auth_settings.keycloak_token_url}/introspect"
+    ).mock(return_value=httpx.Response(200, json={"active": True, "sub": "user-123"}))
+    from src.adapters.api.routes.auth import introspection_cache
+
+    introspection_cache.clear()
+    claims = {**VALID_CLAIMS, "exp": int(time.time()) + exp_offset}
+    with patch(
+        "src.adapters.api.routes.auth.verify_token", AsyncMock(return_value=claims)
+    ):
+        response = client.post(f"/api/v1/validate{query}", headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    assert response.json()["active"] is True
+    assert introspect_route.call_count == expected_calls
+
+
+@pytest.fixture
+def clear_introspection_caches():
+    from src.adapters.api.routes.auth import inactive_token_cache, introspection_cache
+
+    for cache in (introspection_cache, inactive_token_cache):
+        cache.clear()
+        cache.stats.reset()
+    yield introspection_cache, inactive_token_cache
+
+
+def test_validate_introspection_result_is_cached(
+    client: TestClient,
+    respx_mock: MockRouter,
+    mock_auth_settings,
+    clear_introspection_caches,
+):
+    introspection_cache, _ = clear_introspection_caches
+    introspect_route = respx_mock.post(
+        f"{mock_auth_settings.keycloak_token_url}/introspect"
+    ).mock(
+        return_value=httpx.Response(
+            200, json={"active": True, "sub": "user-123", "exp": int(time.time()) + 300}
+        )
+    )
+    for _ in range(3):
+        response = client.post("/api/v1/validate", headers=AUTH_HEADER)
+        assert response.status_code == 200
+
+    assert introspect_route.call_count == 1
+    assert introspection_cache.stats.hits == 2
+    assert introspection_cache.stats.hit_ratio == pytest.approx(2 / 3)
+
+
+def test_validate_inactive_token_is_negatively_cached(
+    client: TestClient,
+    respx_mock: MockRouter,
+    mock_auth_settings,
+    clear_introspection_caches,
+):
+    _, inactive_token_cache = clear_introspection_caches
+    introspect_route = respx_mock.post(
+        f"{mock_auth_settings.keycloak_token_url}/introspect"
+    ).mock(return_value=httpx.Response(200, json={"active": False}))
+    for _ in range(2):
+        response = client.post("/api/v1/validate", headers=AUTH_HEADER)
+        assert response.status_code == 401
+
+    assert introspect_route.call_count == 1
+    assert inactive_token_cache.stats.hits == 1
+
+
+def test_validate_does_not_cache_introspection_errors(
+    client: TestClient,
+    respx_mock: MockRouter,
+    mock_auth_settings,
+    clear_introspection_caches,
+):
+    introspect_route = respx_mock.post(
+        f"{mock_auth_settings.keycloak_token_url}/introspect"
+    ).mock(return_value=httpx.Response(503))
+    for _ in range(2):
+        client.post("/api/v1/validate", headers=AUTH_HEADER)
+    assert introspect_route.call_count == 2
+
+
 # --- Testes das Rotas de Usuários (/users) ---
 
 
@@ -108,12 +263,174 @@ def test_create_user_route(client: TestClient, mock_user_service: MagicMock):
 
 
 def test_get_all_users_route(client: TestClient, mock_user_service: MagicMock):
-    mock_user_service.find_all.return_value = [VALID_USER]
+    mock_user_service.find_page.return_value = Page(
+        items=[VALID_USER], first=0, max=100, has_more=False
+    )
     response = client.get("/users?enabled=true")
     assert response.status_code == 200
     assert len(response.json()) == 1
     assert response.json()[0]["username"] == "test@example.com"
-    mock_user_service.find_all.assert_awaited_once_with(enabled=True)
+    mock_user_service.find_page.assert_awaited_once_with(0, 100, UserFilter(enabled=True))
+
+
+def test_get_all_users_paginated(client: TestClient, mock_user_service: MagicMock):
+    mock_user_service.find_page.return_value = Page(
+        items=[VALID_USER], first=20, max=10, has_more=True
+    )
+    response = client.get("/api/v1/users?first=20&max=10", headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    links = response.headers["Link"]
+    assert 'first=30&max=10>; rel="next"' in links
+    assert 'first=10&max=10>; rel="prev"' in links
+    mock_user_service.find_page.assert_awaited_once_with(20, 10, UserFilter())
+
+
+def test_get_all_users_forwards_filters(client: TestClient, mock_user_service: MagicMock):
+    mock_user_service.find_page.return_value = Page(
+        items=[], first=0, max=100, has_more=False
+    )
+    response = client.get(
+        "/api/v1/users?search=ana&last_name=Silva&exact=true&enabled=false",
+        headers=AUTH_HEADER,
+    )
+
+    assert response.status_code == 200
+    filters = mock_user_service.find_page.await_args.args[2]
+    assert filters == UserFilter(enabled=False, search="ana", last_name="Silva", exact=True)
+
+
+def test_list_serializer_matches_response_model():
+    """O caminho rápido gera o mesmo JSON que a validação pelo response_model."""
+    role_without_description = Role(id="role-9", name="viewer", enabled=False)
+    assert json.loads(ListSerializer(UserResponse).dump([VALID_USER])) == [
+        UserResponse.model_validate(VALID_USER.model_dump()).model_dump(by_alias=True)
+    ]
+    roles = [VALID_ROLE, role_without_description]
+    assert json.loads(ListSerializer(RoleResponse).dump(roles)) == [
+        RoleResponse.model_validate(role.model_dump()).model_dump() for role in roles
+    ]
+
+
+def test_get_all_users_uses_public_field_names(
+    client: TestClient, mock_user_service: MagicMock
+):
+    mock_user_service.find_page.return_value = Page(
+        items=[VALID_USER], first=0, max=100, has_more=False
+    )
+    response = client.get("/api/v1/users", headers=AUTH_HEADER)
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [
+        {
+            "id": "user-123",
+            "username": "test@example.com",
+            "firstName": "Test",
+            "lastName": "User",
+            "enabled": True,
+        }
+    ]
+
+
+def test_get_user_roles_route(client: TestClient, mock_user_service: MagicMock):
+    mock_user_service.get_user_roles.return_value = [VALID_ROLE]
+    response = client.get("/api/v1/users/user-123/roles", headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"name": "admin", "description": "Admin Role", "id": "role-123", "enabled": True}
+    ]
+    mock_user_service.get_user_roles.assert_awaited_once_with("user-123")
+
+
+def test_get_all_users_rejects_page_size_above_maximum(
+    client: TestClient, mock_user_service: MagicMock
+):
+    response = client.get("/api/v1/users?max=100000", headers=AUTH_HEADER)
+    assert response.status_code == 422
+    mock_user_service.find_page.assert_not_awaited()
+
+
+def test_export_users_streams_ndjson(client: TestClient, mock_user_service: MagicMock):
+    second_user = VALID_USER.model_copy(update={"id": "user-456"})
+
+    async def pages():
+        yield [VALID_USER]
+        yield [second_user]
+
+    mock_user_service.iter_users = MagicMock(return_value=pages())
+    response = client.get("/api/v1/users/export?enabled=true", headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == ["user-123", "user-456"]
+    assert rows[0]["firstName"] == "Test"
+    mock_user_service.iter_users.assert_called_once_with(UserFilter(enabled=True))
+
+
+def test_export_users_keycloak_error_before_streaming(
+    client: TestClient, mock_user_service: MagicMock
+):
+    async def pages():
+        raise KeycloakAPIError(503, "Keycloak indisponível")
+        yield []
+
+    mock_user_service.iter_users = MagicMock(return_value=pages())
+    response = client.get("/api/v1/users/export", headers=AUTH_HEADER)
+
+    assert response.status_code == 503
+
+
+def test_bulk_users_route(client: TestClient, mock_user_service: MagicMock):
+    mock_user_service.bulk_write.return_value = [
+        BulkItemResult(index=0, action="create", status_code=201, user_id="new-id"),
+        BulkItemResult(
+            index=1,
+            action="disable",
+            status_code=404,
+            user_id="user-9",
+            error_code="OA-404",
+            error_description="Objeto não localizado",
+        ),
+    ]
+    payload = {
+        "operations": [
+            {
+                "action": "create",
+                "user": {
+                    "username": "new@example.com",
+                    "password": "password123",
+                    "firstName": "New",
+                    "lastName": "User",
+                },
+            },
+            {"action": "disable", "id": "user-9"},
+        ]
+    }
+    response = client.post("/api/v1/users/bulk", json=payload, headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    assert (response.json()["succeeded"], response.json()["failed"]) == (1, 1)
+    assert response.json()["results"][1]["status_code"] == 404
+    operations = mock_user_service.bulk_write.await_args.args[0]
+    assert operations[0] == BulkOperation(
+        action="create",
+        data={
+            "first_name": "New",
+            "last_name": "User",
+            "username": "new@example.com",
+            "password": "password123",
+        },
+    )
+    assert operations[1] == BulkOperation(action="disable", user_id="user-9")
+
+
+def test_bulk_users_route_rejects_unknown_action(client: TestClient):
+    payload = {"operations": [{"action": "delete", "id": "user-9"}]}
+    response = client.post("/api/v1/users/bulk", json=payload, headers=AUTH_HEADER)
+    assert response.status_code == 422
 
 
 def test_get_user_by_id_success(client: TestClient, mock_user_service: MagicMock):
@@ -185,13 +502,59 @@ def test_create_role_conflict(client: TestClient, mock_role_service: MagicMock):
 
 
 def test_get_all_roles_route(client: TestClient, mock_role_service: MagicMock):
-    mock_role_service.get_all_roles.return_value = [VALID_ROLE]
+    mock_role_service.get_roles_page.return_value = Page(
+        items=[VALID_ROLE], first=0, max=100, has_more=False, total=1
+    )
     response = client.get("/roles")
     assert response.status_code == 200
     assert len(response.json()) == 1
     assert response.json()[0]["name"] == "admin"
 
 
+def test_get_all_roles_paginated(client: TestClient, mock_role_service: MagicMock):
+    mock_role_service.get_roles_page.return_value = Page(
+        items=[VALID_ROLE], first=0, max=1, has_more=True, total=3
+    )
+    response = client.get("/api/v1/roles?max=1&enabled=true", headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "3"
+    assert 'rel="next"' in response.headers["Link"]
+    assert 'rel="prev"' not in response.headers["Link"]
+    mock_role_service.get_roles_page.assert_awaited_once_with(
+        0, 1, enabled=True, search=None
+    )
+
+
+def test_assign_roles_to_users_route(client: TestClient, mock_role_service: MagicMock):
+    mock_role_service.assign_roles_to_users.return_value = [
+        RoleAssignmentResult(user_id="u1", status_code=204),
+        RoleAssignmentResult(
+            user_id="u2", status_code=404, error_code="OA-404", error_description="x"
+        ),
+    ]
+    payload = {"user_ids": ["u1", "u2"], "role_ids": ["role-123"]}
+    response = client.post("/api/v1/roles/assignments", json=payload, headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    assert (response.json()["succeeded"], response.json()["failed"]) == (1, 1)
+    mock_role_service.assign_roles_to_users.assert_awaited_once_with(["u1", "u2"], ["role-123"])
+
+
+def test_remove_roles_from_users_route(client: TestClient, mock_role_service: MagicMock):
+    mock_role_service.remove_roles_from_users.return_value = [
+        RoleAssignmentResult(user_id="u1", status_code=204)
+    ]
+    payload = {"user_ids": ["u1"], "role_ids": ["role-123"]}
+    response = client.request(
+        "DELETE", "/api/v1/roles/assignments", json=payload, headers=AUTH_HEADER
+    )
+
+    assert response.status_code == 200
+    assert response.json()["results"][0]["user_id"] == "u1"
+    mock_role_service.delete_role.assert_not_awaited()
+
+
 def test_get_role_by_id_success(client: TestClient, mock_role_service: MagicMock):
     mock_role_service.get_role_by_id.return_value = VALID_ROLE
     response = client.get("/roles/role-123")
@@ -4,8 +4,9 @@ import pytest
 from fastapi.testclient import TestClient
 from pydantic import ValidationError
 
+from src.core.domain.bulk import RoleAssignmentResult
 from src.core.domain.role import Role
-from src.core.domain.user import User
+from src.core.domain.user import User, UserFilter
 from src.core.exceptions import (
     BaseAPIException,
     ConflictAlreadyExistsError,
@@ -39,9 +40,9 @@ def user_service(mock_user_repo: MagicMock, mock_role_repo: MagicMock) -> UserSe
 
 
 @pytest.fixture
-def role_service(mock_role_repo: MagicMock) -> RoleService:
-    """Fixture que injeta o repositório mockado no RoleService."""
-    return RoleService(role_repository=mock_role_repo)
+def role_service(mock_role_repo: MagicMock, mock_user_repo: MagicMock) -> RoleService:
+    """Fixture que injeta os repositórios mockados no RoleService."""
+    return RoleService(role_repository=mock_role_repo, user_repository=mock_user_repo)
 
 
 @pytest.fixture(scope="session")
@@ -153,6 +154,16 @@ async def test_user_service_find_all(
     mock_user_repo.find_all.assert_awaited_once_with(True)
 
 
+@pytest.mark.asyncio
+async def test_user_service_find_page(
+    user_service: UserService, mock_user_repo: MagicMock
+):
+    """Testa o repasse da busca paginada de usuários."""
+    filters = UserFilter(enabled=False)
+    await user_service.find_page(50, 25, filters)
+    mock_user_repo.find_page.assert_awaited_once_with(50, 25, filters)
+
+
 @pytest.mark.asyncio
 async def test_user_service_find_by_id(
     user_service: UserService, mock_user_repo: MagicMock
@@ -270,10 +281,10 @@ async def test_role_service_create_role_conflict_raises_error(
 ):
     """Testa que a criação de role com nome duplicado levanta ConflictAlreadyExistsError."""
     role_data = {"name": "existing-role"}
-    mock_role_repo.find_by_name.return_value = "existing"
+    mock_role_repo.create.side_effect = ConflictAlreadyExistsError()
     with pytest.raises(ConflictAlreadyExistsError):
         await role_service.create_role(role_data)
-    mock_role_repo.create.assert_not_awaited()
+    mock_role_repo.find_by_name.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -311,8 +322,7 @@ async def test_role_service_update_role_success(
 ):
     """Testa a atualização completa de um role com sucesso."""
     role_data = {"name": "new-name"}
-    mock_role_repo.find_by_id.return_value = Role(id="role-1", name="old-name")
-    mock_role_repo.update.return_value = Role(id="role-1", name="new-name")
+    mock_role_repo.update.return_value = Role(id="role-1", name="new-name", enabled=True)
 
     updated_role = await role_service.update_role("role-1", role_data)
 
@@ -325,7 +335,6 @@ async def test_role_service_update_role_not_found_on_update_raises_error(
     role_service: RoleService, mock_role_repo: MagicMock
 ):
     """Testa que se o repositório falhar em atualizar, levanta NotFoundError."""
-    mock_role_repo.find_by_id.return_value = "found_role"
     mock_role_repo.update.return_value = None  # Simula falha na atualização
     with pytest.raises(NotFoundError):
         await role_service.update_role("role-1", {"name": "new-name"})
@@ -336,7 +345,6 @@ async def test_role_service_partial_update_role_filters_none_values(
     role_service: RoleService, mock_role_repo: MagicMock
 ):
     """Testa que a atualização parcial filtra campos nulos."""
-    mock_role_repo.find_by_id.return_value = "found_role"
     update_data = {"name": "new-name", "description": None}
     expected_payload = {"name": "new-name"}
 
@@ -350,7 +358,7 @@ async def test_role_service_partial_update_role_with_empty_payload(
     role_service: RoleService, mock_role_repo: MagicMock
 ):
     """Testa que a atualização parcial com payload vazio não chama o update."""
-    current_role = Role(id="role-1", name="current")
+    current_role = Role(id="role-1", name="current", enabled=True)
     mock_role_repo.find_by_id.return_value = current_role
     update_data = {"name": None, "description": None}
 
@@ -365,18 +373,55 @@ async def test_role_service_partial_update_role_not_found_on_update_raises_error
     role_service: RoleService, mock_role_repo: MagicMock
 ):
     """Testa que se o repositório falhar na atualização parcial, levanta NotFoundError."""
-    mock_role_repo.find_by_id.return_value = "found_role"
     mock_role_repo.update.return_value = None  # Simula falha
     with pytest.raises(NotFoundError):
         await role_service.partial_update_role("role-1", {"name": "new-name"})
 
 
 @pytest.mark.asyncio
-async def test_role_service_delete_role_success(
+async def test_role_service_update_role_skips_pre_read(
+    role_service: RoleService, mock_role_repo: MagicMock
+):
+    """Testa que a atualização vai direto ao repositório, sem buscar o role antes."""
+    updated = Role(id="role-1", name="new-name", enabled=True)
+    mock_role_repo.update.return_value = updated
+
+    assert await role_service.update_role("role-1", {"name": "new-name"}) == updated
+    assert await role_service.partial_update_role("role-1", {"name": "new-name"}) == updated
+    mock_role_repo.find_by_id.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_role_service_update_role_propagates_not_found(
     role_service: RoleService, mock_role_repo: MagicMock
+):
+    """Testa que o NotFoundError do repositório chega ao chamador."""
+    mock_role_repo.update.side_effect = NotFoundError("Role com ID 'x' não encontrado.")
+    with pytest.raises(NotFoundError):
+        await role_service.update_role("x", {"name": "new-name"})
+
+
+ROLE_TO_DELETE = Role(id="role-1", name="old-role", enabled=True)
+
+
+def _holder(user_id: str) -> User:
+    return User(
+        id=user_id, username=f"{user_id}@test.com", first_name="F", last_name="L", enabled=True
+    )
+
+
+async def _pages(*pages: list[User]):
+    for page in pages:
+        yield page
+
+
+@pytest.mark.asyncio
+async def test_role_service_delete_role_success(
+    role_service: RoleService, mock_role_repo: MagicMock, mock_user_repo: MagicMock
 ):
     """Testa a deleção bem-sucedida de um role."""
-    mock_role_repo.find_by_id.return_value = "found_role"
+    mock_role_repo.find_by_id.return_value = ROLE_TO_DELETE
+    mock_user_repo.iter_users_by_role_name = MagicMock(return_value=_pages())
     mock_role_repo.delete.return_value = True
     await role_service.delete_role("role-1")
     mock_role_repo.delete.assert_awaited_once_with("role-1")
@@ -384,22 +429,69 @@ async def test_role_service_delete_role_success(
 
 @pytest.mark.asyncio
 async def test_role_service_delete_role_repo_fails_raises_error(
-    role_service: RoleService, mock_role_repo: MagicMock
+    role_service: RoleService, mock_role_repo: MagicMock, mock_user_repo: MagicMock
 ):
     """Testa que se o repositório falhar na deleção, levanta NotFoundError."""
-    mock_role_repo.find_by_id.return_value = "found_role"
+    mock_role_repo.find_by_id.return_value = ROLE_TO_DELETE
+    mock_user_repo.iter_users_by_role_name = MagicMock(return_value=_pages())
     mock_role_repo.delete.return_value = False  # Simula falha na deleção
     with pytest.raises(NotFoundError):
         await role_service.delete_role("role-1")
 
 
+@pytest.mark.asyncio
+async def test_role_service_delete_role_cascades_over_every_page(
+    role_service: RoleService, mock_role_repo: MagicMock, mock_user_repo: MagicMock
+):
+    """Testa que o role é removido de todos os usuários, de todas as páginas."""
+    holders = [_holder(f"u{i}") for i in range(3)]
+    mock_role_repo.find_by_id.return_value = ROLE_TO_DELETE
+    mock_user_repo.iter_users_by_role_name = MagicMock(
+        return_value=_pages(holders[:2], holders[2:])
+    )
+    mock_role_repo.remove_roles_from_users.return_value = [
+        RoleAssignmentResult(user_id="u0", status_code=204),
+        RoleAssignmentResult(user_id="u1", status_code=404),  # Usuário já removido
+        RoleAssignmentResult(user_id="u2", status_code=204),
+    ]
+    mock_role_repo.delete.return_value = True
+
+    await role_service.delete_role("role-1")
+
+    mock_role_repo.remove_roles_from_users.assert_awaited_once_with(
+        ["u0", "u1", "u2"], [ROLE_TO_DELETE]
+    )
+    mock_role_repo.delete.assert_awaited_once_with("role-1")
+
+
+@pytest.mark.asyncio
+async def test_role_service_delete_role_partial_failure_keeps_role(
+    role_service: RoleService, mock_role_repo: MagicMock, mock_user_repo: MagicMock
+):
+    """Testa que falhas na cascata são reportadas e o role não é desativado."""
+    mock_role_repo.find_by_id.return_value = ROLE_TO_DELETE
+    mock_user_repo.iter_users_by_role_name = MagicMock(
+        return_value=_pages([_holder("u0"), _holder("u1")])
+    )
+    mock_role_repo.remove_roles_from_users.return_value = [
+        RoleAssignmentResult(user_id="u0", status_code=204),
+        RoleAssignmentResult(user_id="u1", status_code=503, error_description="down"),
+    ]
+
+    with pytest.raises(KeycloakAPIError) as exc_info:
+        await role_service.delete_role("role-1")
+
+    assert exc_info.value.error_stack == [{"user_id": "u1", "error_description": "down"}]
+    mock_role_repo.delete.assert_not_awaited()
+
+
 @pytest.mark.asyncio
 async def test_role_service_assign_roles_to_user_success(
     role_service: RoleService, mock_role_repo: MagicMock
 ):
     """Testa a atribuição de múltiplos roles a um usuário."""
-    roles = [Role(id="r1", name="admin"), Role(id="r2", name="editor")]
-    mock_role_repo.find_by_id.side_effect = roles
+    roles = [Role(id="r1", name="admin", enabled=True), Role(id="r2", name="editor", enabled=True)]
+    mock_role_repo.find_by_ids.return_value = roles
 
     await role_service.assign_roles_to_user("user-1", ["r1", "r2"])
 
@@ -420,18 +512,33 @@ async def test_role_service_assign_roles_to_user_not_found_raises_error(
     role_service: RoleService, mock_role_repo: MagicMock
 ):
     """Testa que a atribuição falha se um dos roles não for encontrado."""
-    mock_role_repo.find_by_id.return_value = None
+    mock_role_repo.find_by_ids.return_value = []
     with pytest.raises(NotFoundError):
         await role_service.assign_roles_to_user("user-1", ["not-found-role"])
 
 
+@pytest.mark.asyncio
+async def test_role_service_assign_roles_reports_all_missing_ids(
+    role_service: RoleService, mock_role_repo: MagicMock
+):
+    """Testa que todos os IDs ausentes são informados juntos, sem alterar nada."""
+    mock_role_repo.find_by_ids.return_value = [Role(id="r2", name="editor", enabled=True)]
+
+    with pytest.raises(NotFoundError) as exc_info:
+        await role_service.assign_roles_to_user("user-1", ["r1", "r2", "r3", "r1"])
+
+    assert exc_info.value.error_stack == [{"role_id": "r1"}, {"role_id": "r3"}]
+    mock_role_repo.find_by_ids.assert_awaited_once_with(["r1", "r2", "r3"])
+    mock_role_repo.add_roles_to_user.assert_not_awaited()
+
+
 @pytest.mark.asyncio
 async def test_role_service_remove_roles_from_user_success(
     role_service: RoleService, mock_role_repo: MagicMock
 ):
     """Testa a remoção de múltiplos roles de um usuário."""
-    roles = [Role(id="r1", name="admin"), Role(id="r2", name="editor")]
-    mock_role_repo.find_by_id.side_effect = roles
+    roles = [Role(id="r1", name="admin", enabled=True), Role(id="r2", name="editor", enabled=True)]
+    mock_role_repo.find_by_ids.return_value = roles
 
     await role_service.remove_roles_from_user("user-1", ["r1", "r2"])
 